@@ -0,0 +1,431 @@
+"""Offline load test of the music cog: many guilds, no Discord, no network.
+
+Drives the real Music cog with fake guilds, contexts and voice clients. yt-dlp is
+replaced by a stub with configurable latency and failure rate (plugged in through
+ExtractionScheduler's ytdl_factory), and FFmpeg by a source that hands out silence
+after a configurable start-up delay. Each simulated guild plays a track, then
+keeps issuing !play, playlist loads, !skip, !shuffle and !queue at random, while
+tracks end on their own after their (short) stub duration.
+
+Reports command throughput and latency, time to first audio, the gap between
+tracks, event-loop lag and memory.
+
+Run from the repository root:
+    python -m benchmarks.load [--guilds 1000] [--seconds 30] [--latency 0.05] [--failure-rate 0.02]
+"""
+import argparse
+import asyncio
+import os
+import random
+import resource
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from itertools import count
+
+import discord
+from discord.ext import commands
+from yt_dlp.utils import DownloadError, ExtractorError
+
+FRAME = b"\0" * discord.opus.Encoder.FRAME_SIZE
+# Share of each action once a guild is up and running
+ACTIONS = {"play": 35, "playlist": 5, "skip": 20, "shuffle": 10, "queue": 30}
+
+
+def percentiles(samples: list[float]) -> str:
+    if not samples:
+        return "      -        -        -"
+    ordered = sorted(samples)
+    pick = lambda p: ordered[min(int(len(ordered) * p), len(ordered) - 1)] * 1000
+    return f"{pick(0.5):7.1f}  {pick(0.95):7.1f}  {pick(0.99):7.1f}"
+
+
+# ── stubs ────────────────────────────────────────────────────
+
+
+class StubYoutubeDL:
+    """Stands in for yt_dlp.YoutubeDL: sleeps like a network round trip, then makes up an answer."""
+
+    latency = 0.05
+    failure_rate = 0.0
+    track_seconds = 10.0
+    playlist_size = 200
+
+    def __init__(self, options: dict):
+        self.options = options
+
+    def _wait(self):
+        time.sleep(random.uniform(0.5, 1.5) * self.latency)
+
+    def _info(self, video_id: str) -> dict:
+        page = f"https://www.youtube.com/watch?v={video_id}"
+        return {
+            "title": f"Artist {hash(video_id) % 300} - Song {video_id}",
+            "url": f"https://rr1---sn-stub.googlevideo.com/videoplayback?id={video_id}",
+            "webpage_url": page,
+            "duration": round(self.track_seconds * random.uniform(0.7, 1.3), 1),
+            "acodec": "opus",
+            "format_id": "251",
+        }
+
+    def _entries(self, list_id: str):
+        # Flat entries, one "page" of 100 at a time, like a real playlist
+        for i in range(self.playlist_size):
+            if i and i % 100 == 0:
+                self._wait()
+            video_id = f"{list_id}-{i}"
+            yield {
+                "title": f"Artist {hash(video_id) % 300} - Song {video_id}",
+                "url": f"https://www.youtube.com/watch?v={video_id}",
+                "webpage_url": f"https://www.youtube.com/watch?v={video_id}",
+                "duration": self.track_seconds,
+            }
+
+    def extract_info(self, url: str, download: bool = False, process: bool = True) -> dict:
+        self._wait()
+        if random.random() < self.failure_rate:
+            # Shaped like yt-dlp's: the extractor's error, marked expected, wrapped in a DownloadError
+            error = ExtractorError("Video unavailable (stub)", expected=True)
+            raise DownloadError(f"ERROR: {error}", (ExtractorError, error, None))
+        if "list=" in url:
+            return {"_type": "playlist", "entries": self._entries(url.rsplit("=", 1)[1])}
+        if url.startswith(("ytsearch", "scsearch")):
+            return {"entries": [self._info(url.split(":", 1)[1].replace(" ", "_"))]}
+        return self._info(url.rsplit("=", 1)[1])
+
+
+class StubStream(discord.AudioSource):
+    """FFmpegPCMAudio without FFmpeg: the first read takes ``startup`` seconds, the rest are instant."""
+
+    def __init__(self, startup: float):
+        self.startup = startup
+        self.started = False
+
+    def read(self) -> bytes:
+        if not self.started:
+            time.sleep(self.startup)
+            self.started = True
+        return FRAME
+
+
+class Recorder:
+    """Everything the run measures."""
+
+    def __init__(self):
+        self.commands: dict[str, list[float]] = defaultdict(list)
+        self.ttfa: list[float] = []
+        self.gaps: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.track_starts = 0
+        self.messages = 0
+
+
+class FakeMessage:
+    ids = count(1)
+
+    def __init__(self, channel: "FakeChannel", content: str | None):
+        self.id = next(self.ids)
+        self.channel = channel
+        self.content = content
+
+    async def edit(self, content: str | None = None, **kwargs):
+        self.content = content
+
+
+class FakeChannel:
+    def __init__(self, recorder: Recorder):
+        self.id = next(FakeMessage.ids)
+        self.recorder = recorder
+        self.last_message_id: int | None = None
+        self.members = []
+
+    async def send(self, content: str | None = None, **kwargs) -> FakeMessage:
+        self.recorder.messages += 1
+        message = FakeMessage(self, content)
+        self.last_message_id = message.id
+        return message
+
+    async def connect(self, **kwargs) -> "FakeVoiceClient":
+        raise NotImplementedError  # replaced per guild, see FakeGuild
+
+
+class FakeVoiceClient:
+    """Plays a source for its track's duration, calling ``after`` like discord.py's player.
+
+    The first frame is read on a thread of its own (as the real player does), which
+    is when the stub FFmpeg start-up delay and any prebuffer wait are paid.
+    """
+
+    def __init__(self, guild: "FakeGuild", channel: FakeChannel, recorder: Recorder, loop: asyncio.AbstractEventLoop):
+        self.guild = guild
+        self.channel = channel
+        self.recorder = recorder
+        self.loop = loop
+        self.source: discord.AudioSource | None = None
+        self._after = None
+        self._end: asyncio.TimerHandle | None = None
+        self._paused = False
+        self._ended: tuple[float, str] | None = None  # when and why the last track stopped
+
+    def is_playing(self) -> bool:
+        return self.source is not None and not self._paused
+
+    def is_paused(self) -> bool:
+        return self.source is not None and self._paused
+
+    def play(self, source: discord.AudioSource, *, after=None):
+        self.source, self._after = source, after
+        self._paused = False
+        threading.Thread(target=self._first_frame, args=(source,), daemon=True).start()
+
+    def _first_frame(self, source: discord.AudioSource):
+        source.read()
+        try:
+            self.loop.call_soon_threadsafe(self._started, source)
+        except RuntimeError:
+            pass  # the run is over and the loop is closed
+
+    def _started(self, source: discord.AudioSource):
+        if source is not self.source:
+            return
+        now = time.monotonic()
+        self.recorder.track_starts += 1
+        if self.guild.play_requested is not None:
+            self.recorder.ttfa.append(now - self.guild.play_requested)
+            self.guild.play_requested = None
+        if self._ended is not None:
+            ended, cause = self._ended
+            self.recorder.gaps[cause].append(now - ended)
+            self._ended = None
+        current = self.guild.cog._state(self.guild.id).now_playing
+        self._end = self.loop.call_later(current.duration if current else 1, self._finish, "natural")
+
+    def _finish(self, cause: str):
+        if self._end is not None:
+            self._end.cancel()
+            self._end = None
+        source, after = self.source, self._after
+        if source is None:
+            return
+        self.source = self._after = None
+        self._ended = (time.monotonic(), cause)
+        source.cleanup()
+        if after is not None:
+            after(None)
+
+    def stop(self):
+        self._finish("skip")
+
+    def pause(self):
+        self._paused = True
+
+    def resume(self):
+        self._paused = False
+
+    async def move_to(self, channel):
+        self.channel = channel
+
+    async def disconnect(self, *, force: bool = False):
+        self._ended = None
+        self._finish("disconnect")
+        self.guild.voice_client = None
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, cog, recorder: Recorder, loop: asyncio.AbstractEventLoop):
+        self.id = guild_id
+        self.cog = cog
+        self.voice_client: FakeVoiceClient | None = None
+        self.text = FakeChannel(recorder)
+        self.voice = FakeChannel(recorder)
+        self.play_requested: float | None = None
+
+        async def connect(**kwargs):
+            self.voice_client = FakeVoiceClient(self, self.voice, recorder, loop)
+            return self.voice_client
+
+        self.voice.connect = connect
+
+
+class FakeContext:
+    def __init__(self, guild: FakeGuild, command: commands.Command):
+        self.guild = guild
+        self.channel = guild.text
+        self.command = command
+        self.author = type("Member", (), {"voice": type("VoiceState", (), {"channel": guild.voice})()})()
+
+    @property
+    def voice_client(self) -> FakeVoiceClient | None:
+        return self.guild.voice_client
+
+    async def send(self, content: str | None = None, **kwargs) -> FakeMessage:
+        return await self.channel.send(content, **kwargs)
+
+    def typing(self):
+        return _NoTyping()
+
+
+class _NoTyping:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+# ── the run ──────────────────────────────────────────────────
+
+
+def make_cog_class(startup: float):
+    # Imported here: the cog reads its settings from the environment at import time
+    from cogs.music import EXTRACT_WORKERS, PLAYLIST_WORKERS, Music
+    from cogs.utils.extractor import ExtractionScheduler
+
+    class LoadTestMusic(Music):
+        def __init__(self, bot: commands.Bot):
+            super().__init__(bot)
+            # Not started yet (that happens in cog_load), so it can simply be swapped out
+            self.extractor = ExtractionScheduler(
+                workers=EXTRACT_WORKERS, ytdl_factory=StubYoutubeDL, long_workers=PLAYLIST_WORKERS
+            )
+            if self.search:
+                self.search.extractor = self.extractor
+
+        def _ffmpeg_source(self, guild_id, key, url, codec, position=0):
+            return StubStream(startup)
+
+    return LoadTestMusic
+
+
+async def invoke(cog, guild: FakeGuild, recorder: Recorder, name: str, *args, **kwargs):
+    command = cog.bot.get_command(name)
+    ctx = FakeContext(guild, command)
+    start = time.monotonic()
+    try:
+        await cog.cog_before_invoke(ctx)
+        await command.callback(cog, ctx, *args, **kwargs)
+        await cog.cog_after_invoke(ctx)
+    except Exception as e:
+        # The bot would reply with the error (see on_command_error); keep going like it does
+        if not recorder.errors:
+            print(f"First command error, in !{name}: {e!r}")
+        recorder.errors[name] += 1
+    recorder.commands[name].append(time.monotonic() - start)
+
+
+async def user(cog, guild: FakeGuild, recorder: Recorder, args, ramp: float):
+    """One guild's listeners: start something, then keep poking at it."""
+    await asyncio.sleep(random.uniform(0, ramp))
+    names, weights = zip(*ACTIONS.items())
+    action = "play"
+    while True:
+        vc = guild.voice_client
+        idle = vc is None or not (vc.is_playing() or vc.is_paused())
+        if action in ("play", "playlist") and idle:
+            guild.play_requested = time.monotonic()
+        if action == "play":
+            if random.random() < 0.5:
+                query = f"artist {random.randrange(300)} song {random.randrange(args.catalog)}"
+            else:
+                query = f"https://www.youtube.com/watch?v={random.randrange(args.catalog)}"
+            await invoke(cog, guild, recorder, "play", query=query)
+        elif action == "playlist":
+            await invoke(cog, guild, recorder, "play",
+                         query=f"https://www.youtube.com/playlist?list=PL{random.randrange(args.catalog)}")
+        elif action == "queue":
+            await invoke(cog, guild, recorder, "queue", 1)
+        else:
+            await invoke(cog, guild, recorder, action)
+        await asyncio.sleep(random.expovariate(1 / args.think))
+        action = random.choices(names, weights)[0]
+
+
+async def measure_lag(samples: list[float], interval: float = 0.05):
+    while True:
+        before = time.monotonic()
+        await asyncio.sleep(interval)
+        samples.append(max(time.monotonic() - before - interval, 0.0))
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--guilds", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=30, help="length of the run")
+    parser.add_argument("--latency", type=float, default=0.05, help="mean stub yt-dlp call time (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.02, help="share of stub yt-dlp calls that fail")
+    parser.add_argument("--ffmpeg-startup", type=float, default=0.1, help="stub FFmpeg time to first frame (s)")
+    parser.add_argument("--track-seconds", type=float, default=10, help="mean stub track length (s)")
+    parser.add_argument("--playlist-size", type=int, default=200)
+    parser.add_argument("--think", type=float, default=5, help="mean time between a guild's commands (s)")
+    parser.add_argument("--catalog", type=int, default=20_000, help="distinct tracks to pick from")
+    parser.add_argument("--workers", type=int, help="EXTRACT_WORKERS (default: the bot's)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    StubYoutubeDL.latency = args.latency
+    StubYoutubeDL.failure_rate = args.failure_rate
+    StubYoutubeDL.track_seconds = args.track_seconds
+    StubYoutubeDL.playlist_size = args.playlist_size
+
+    tmp = tempfile.TemporaryDirectory()
+    os.environ["STATE_DB"] = os.path.join(tmp.name, "state.db")
+    if args.workers is not None:
+        os.environ["EXTRACT_WORKERS"] = str(args.workers)
+    os.environ.setdefault("LOOP_LAG_THRESHOLD_MS", "0")  # the lag is measured below instead
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    loop = asyncio.get_running_loop()
+    bot = commands.Bot(command_prefix="!", intents=discord.Intents.default())
+    bot.loop = loop
+    cog = make_cog_class(args.ffmpeg_startup)(bot)
+    await bot.add_cog(cog)
+
+    recorder = Recorder()
+    guilds = [FakeGuild(guild_id, cog, recorder, loop) for guild_id in range(1, args.guilds + 1)]
+    lags: list[float] = []
+    tasks = [asyncio.create_task(measure_lag(lags))]
+    ramp = min(5.0, args.seconds / 4)
+    tasks += [asyncio.create_task(user(cog, guild, recorder, args, ramp)) for guild in guilds]
+
+    start = time.monotonic()
+    await asyncio.sleep(args.seconds)
+    elapsed = time.monotonic() - start
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    state = cog.guilds.report()
+    pool = cog.extractor.stats()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    for guild in guilds:
+        if guild.voice_client:
+            await guild.voice_client.disconnect()
+    await bot.remove_cog(cog.qualified_name)
+    tmp.cleanup()
+
+    print(f"{args.guilds} guilds for {elapsed:.0f}s: stub yt-dlp {args.latency * 1000:.0f} ms "
+          f"({args.failure_rate * 100:.0f}% failing), FFmpeg start-up {args.ffmpeg_startup * 1000:.0f} ms, "
+          f"{cog.extractor.workers} extraction workers")
+    print(f"{'':24}{'count':>7} {'per s':>7}   {'p50 ms':>7}  {'p95 ms':>7}  {'p99 ms':>7}")
+    for name, samples in sorted(recorder.commands.items()):
+        print(f"  !{name:<21}{len(samples):7} {len(samples) / elapsed:7.1f}   {percentiles(samples)}")
+    print(f"  {'time to first audio':<22}{len(recorder.ttfa):7} {'':7}   {percentiles(recorder.ttfa)}")
+    for cause, samples in sorted(recorder.gaps.items()):
+        print(f"  {f'gap after {cause}':<22}{len(samples):7} {'':7}   {percentiles(samples)}")
+    print(f"  {'event loop lag':<22}{len(lags):7} {'':7}   {percentiles(lags)}  (max {max(lags, default=0) * 1000:.0f} ms)")
+    print(f"Track starts: {recorder.track_starts} ({recorder.track_starts / elapsed:.1f}/s), "
+          f"messages sent: {recorder.messages}, command errors: {sum(recorder.errors.values())}")
+    print(f"Extraction: {pool['completed']} yt-dlp calls ({pool['completed'] / elapsed:.1f}/s), "
+          f"max wait {pool['interactive']['max_wait'] * 1000:.0f} ms interactive / "
+          f"{pool['background']['max_wait'] * 1000:.0f} ms background, "
+          f"{pool['interactive']['queued'] + pool['background']['queued']} still queued at the end; "
+          f"cache {cog.extract_cache.hits} hits / {cog.extract_cache.misses} misses")
+    # ru_maxrss is in KB on Linux
+    print(f"Memory: peak RSS {rss_after / 1024:.0f} MB (+{(rss_after - rss_before) / 1024:.0f} MB during the run), "
+          f"guild state {state['live_bytes'] / 1e6:.1f} MB across {state['live']} guilds")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
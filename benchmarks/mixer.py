@@ -0,0 +1,71 @@
+"""Throughput of the PCM mixer on one core.
+
+Feeds pre-generated 20 ms PCM frames through the same source chains the bot builds
+in PCM mode and reports frames processed per second of CPU time. A voice connection
+needs 50 frames per second, so frames/s / 50 is roughly how many streams one core
+could process (Opus encoding not included).
+
+  volume      PCMVolumeTransformer, the plain volume stage
+  normalize   MixerSource measuring and applying per-track loudness gain
+  crossfade   MixerSource mixing two normalized tracks for the whole run
+
+Requires NumPy.
+
+Run from the repository root:
+    python -m benchmarks.mixer [seconds of audio]
+"""
+import sys
+import time
+
+import discord
+import numpy as np
+
+from cogs.utils.audio import MixerSource
+
+FRAME_SAMPLES = discord.opus.Encoder.SAMPLES_PER_FRAME
+
+
+class FrameSource(discord.AudioSource):
+    """Replays a fixed set of PCM frames, like FFmpegPCMAudio without the subprocess."""
+
+    def __init__(self, frames: list[bytes], count: int):
+        self.frames = frames
+        self.remaining = count
+
+    def read(self) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        self.remaining -= 1
+        return self.frames[self.remaining % len(self.frames)]
+
+
+def make_frames(amplitude: float, count: int = 500) -> list[bytes]:
+    rng = np.random.default_rng(0)
+    noise = rng.normal(0, amplitude, size=(count, FRAME_SAMPLES * 2))
+    return [frame.tobytes() for frame in np.clip(noise, -32768, 32767).astype(np.int16)]
+
+
+def run(label: str, source: discord.AudioSource):
+    frames = 0
+    start = time.process_time()
+    while source.read():
+        frames += 1
+    elapsed = time.process_time() - start
+    print(f"{label:<10} {frames / elapsed:10,.0f} frames/s  ({frames / elapsed / 50:6.0f} streams per core)")
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 120
+    count = int(seconds * 50)
+    quiet, loud = make_frames(800), make_frames(12000)
+
+    run("volume", discord.PCMVolumeTransformer(FrameSource(quiet, count), volume=0.5))
+    run("normalize", MixerSource(FrameSource(quiet, count), volume=0.5))
+
+    mixer = MixerSource(FrameSource(quiet, count), volume=0.5)
+    mixer.crossfade_to(FrameSource(loud, count + 1), frames=count)
+    run("crossfade", mixer)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""CPU cost per stream of the two playback modes.
+
+Plays a local audio file through the same source chain the bot builds, as fast as
+possible, and reports CPU seconds (ours + FFmpeg's) per minute of audio:
+
+  pcm          FFmpegPCMAudio -> PCMVolumeTransformer -> Opus encode in-process
+  opus-copy    FFmpegOpusAudio with codec copy (input must already be Opus)
+  opus-volume  FFmpegOpusAudio, FFmpeg applies volume and encodes
+
+Requires FFmpeg on PATH and discord.py with libopus available.
+
+Run from the repository root:
+    python -m benchmarks.playback_cpu path/to/track.webm
+"""
+import resource
+import sys
+import time
+
+import discord
+from discord.opus import Encoder
+
+FRAME_SECONDS = 0.02
+
+
+def children_cpu() -> float:
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def run(label: str, make_source):
+    encoder = None
+    cpu_before, children_before = time.process_time(), children_cpu()
+    source = make_source()
+    frames = 0
+    try:
+        while frame := source.read():
+            # What the voice player does for every 20 ms frame of a non-Opus source
+            if not source.is_opus():
+                encoder = encoder or Encoder()
+                encoder.encode(frame, Encoder.SAMPLES_PER_FRAME)
+            frames += 1
+    finally:
+        source.cleanup()  # reaps FFmpeg so its CPU time shows up in RUSAGE_CHILDREN
+
+    ours = time.process_time() - cpu_before
+    ffmpeg = children_cpu() - children_before
+    minutes = frames * FRAME_SECONDS / 60
+    if not minutes:
+        print(f"{label:<12} no audio decoded")
+        return
+    print(f"{label:<12} {ours / minutes:6.2f} s bot + {ffmpeg / minutes:6.2f} s ffmpeg "
+          f"= {(ours + ffmpeg) / minutes:6.2f} CPU-s per audio minute")
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    path = sys.argv[1]
+
+    run("pcm", lambda: discord.PCMVolumeTransformer(discord.FFmpegPCMAudio(path, options="-vn"), volume=0.5))
+    run("opus-copy", lambda: discord.FFmpegOpusAudio(path, codec="copy", options="-vn"))
+    run("opus-volume", lambda: discord.FFmpegOpusAudio(path, bitrate=128, options="-vn -af volume=0.5"))
+
+
+if __name__ == "__main__":
+    main()
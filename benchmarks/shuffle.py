@@ -0,0 +1,84 @@
+"""!shuffle cost from 1k to 100k tracks: the old slot-by-slot scan vs the union-find version.
+
+Run from the repository root:
+    python -m benchmarks.shuffle
+"""
+import random
+import time
+from collections import defaultdict
+
+from cogs.utils.shuffle import artist_of, smart_shuffle
+from cogs.utils.track import Track
+
+SIZES = [1_000, 2_000, 5_000, 10_000, 20_000, 50_000, 100_000]
+# The linear scan is too slow to be worth timing past this
+LINEAR_MAX = 50_000
+
+
+def linear_shuffle(tracks: list) -> list:
+    """The previous implementation: scan forward from the ideal slot one position at a time."""
+    groups = defaultdict(list)
+    for track in tracks:
+        groups[artist_of(track.title)].append(track)
+    for group in groups.values():
+        random.shuffle(group)
+
+    total = len(tracks)
+    result = [None] * total
+    taken = [False] * total
+    for group in sorted(groups.values(), key=len, reverse=True):
+        spacing = total / len(group)
+        offset = random.random() * spacing
+        for i, track in enumerate(group):
+            ideal = int(round(offset + i * spacing)) % total
+            for delta in range(total):
+                pos = (ideal + delta) % total
+                if not taken[pos]:
+                    result[pos] = track
+                    taken[pos] = True
+                    break
+    return result
+
+
+def mixed_queue(n: int) -> list[Track]:
+    # A playlist-like mix: a few heavy artists plus a long tail of one-offs
+    tracks = []
+    for i in range(n):
+        roll = random.random()
+        if roll < 0.3:
+            artist = f"Artist {random.randint(0, 4)}"
+        elif roll < 0.7:
+            artist = f"Artist {random.randint(5, 200)}"
+        else:
+            artist = f"Artist {i + 1000}"
+        tracks.append(Track(f"{artist} - Song {i}", f"https://example.com/{i}"))
+    return tracks
+
+
+def unique_queue(n: int) -> list[Track]:
+    # Every track from a different uploader: each lands on a random slot, which is
+    # the worst case for scanning forward through an almost full table
+    return [Track(f"Uploader {i} - Song {i}", f"https://example.com/{i}") for i in range(n)]
+
+
+def timed(fn, tracks) -> float:
+    start = time.perf_counter()
+    fn(tracks)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    random.seed(0)
+    for label, make_queue in (("mixed artists", mixed_queue), ("unique uploaders", unique_queue)):
+        print(label)
+        print(f"{'tracks':>8} {'union-find':>12} {'linear scan':>12}")
+        for n in SIZES:
+            tracks = make_queue(n)
+            fast = timed(smart_shuffle, tracks)
+            slow = f"{timed(linear_shuffle, tracks):9.1f} ms" if n <= LINEAR_MAX else "-"
+            print(f"{n:>8} {fast:9.1f} ms {slow:>12}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
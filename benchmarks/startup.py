@@ -0,0 +1,88 @@
+"""Startup and hot-reload cost of the music cog.
+
+  import    `import cogs.music` in a fresh interpreter (median of several runs), and
+            whether the heavy dependencies (yt-dlp, NumPy) were left for later
+  load      first load_extension, as at startup (import + cog set-up)
+  reload    reload_extension with N guilds of queued state, which must survive
+
+Run from the repository root:
+    python -m benchmarks.startup [guilds] [tracks_per_guild]
+"""
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import discord
+from discord.ext import commands
+
+IMPORT_RUNS = 5
+RELOAD_RUNS = 10
+
+IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import cogs.music
+print(time.perf_counter() - start, "yt_dlp" in sys.modules, "numpy" in sys.modules)
+"""
+
+
+def measure_import() -> tuple[float, bool, bool]:
+    runs = []
+    for _ in range(IMPORT_RUNS):
+        out = subprocess.run([sys.executable, "-c", IMPORT_PROBE], capture_output=True, text=True, check=True)
+        seconds, ytdl, numpy = out.stdout.split()
+        runs.append(float(seconds))
+    return statistics.median(runs), ytdl == "True", numpy == "True"
+
+
+async def measure_reload(guilds: int, tracks: int) -> tuple[float, float, bool]:
+    from cogs.utils.registry import reload_extension
+    from cogs.utils.track import Track
+
+    bot = commands.Bot(command_prefix="!", intents=discord.Intents.default())
+    start = time.perf_counter()
+    await bot.load_extension("cogs.music")
+    load = time.perf_counter() - start
+
+    cog = bot.get_cog("Music")
+    for guild_id in range(1, guilds + 1):
+        cog.guilds.get(guild_id).queue.extend(
+            Track(f"Artist {i % 50} - Song {i}", f"https://www.youtube.com/watch?v={guild_id:06d}{i:05d}", duration=200)
+            for i in range(tracks)
+        )
+    before = {state.guild_id: len(state.queue) for state in cog.guilds}
+
+    reloads = []
+    for _ in range(RELOAD_RUNS):
+        start = time.perf_counter()
+        await reload_extension(bot, "cogs.music")
+        reloads.append(time.perf_counter() - start)
+        await asyncio.sleep(0)  # let the new instance finish catching up
+    after = {state.guild_id: len(state.queue) for state in bot.get_cog("Music").guilds}
+
+    await bot.unload_extension("cogs.music")
+    return load, statistics.median(reloads), before == after
+
+
+def main():
+    guilds = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    tracks = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    seconds, ytdl, numpy = measure_import()
+    print(f"import cogs.music:  {seconds * 1000:7.0f} ms (median of {IMPORT_RUNS} fresh interpreters)")
+    print(f"  yt-dlp imported: {'yes' if ytdl else 'no, deferred'}; NumPy imported: {'yes' if numpy else 'no, deferred'}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["STATE_DB"] = os.path.join(tmp, "state.db")
+        load, reload, kept = asyncio.run(measure_reload(guilds, tracks))
+    print(f"load_extension:     {load * 1000:7.0f} ms (first import in this process)")
+    print(f"reload_extension:   {reload * 1000:7.0f} ms (median of {RELOAD_RUNS}, {guilds} guilds x {tracks} tracks)")
+    print(f"  queues survived reload: {'yes' if kept else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Startup and lazy-restore cost of the SQLite guild store.
+
+Saves N guilds with a queue each, then times what a restart pays: opening the
+store (which only indexes guild IDs) and loading guilds one by one on first use.
+
+Run from the repository root:
+    python -m benchmarks.store_restore [guilds] [tracks_per_guild]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from cogs.utils.store import GuildStore
+from cogs.utils.track import Track
+
+
+def make_state(guild_id: int, tracks: int) -> dict:
+    queue = [
+        Track(f"Artist {i % 50} - Song {i}", f"https://www.youtube.com/watch?v={guild_id:06d}{i:05d}", duration=200).to_row()
+        for i in range(tracks)
+    ]
+    return {"queue": queue, "volume": 0.5, "loop_mode": "off", "text_channel_id": guild_id}
+
+
+async def main():
+    guilds = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    tracks = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "state.db")
+        states = {guild_id: make_state(guild_id, tracks) for guild_id in range(guilds)}
+
+        store = GuildStore(path)
+        await store.open(states.get)
+        for guild_id in states:
+            store.mark_dirty(guild_id)
+        start = time.perf_counter()
+        await store.flush()
+        write = time.perf_counter() - start
+        await store.close()
+        print(f"{guilds} guilds x {tracks} tracks, {os.path.getsize(path) / 1e6:.1f} MB on disk")
+        print(f"  batched write (1 transaction):  {write * 1000:9.1f} ms")
+
+        # A fresh process: open the store, then load each guild when it's first used
+        start = time.perf_counter()
+        store = GuildStore(path)
+        await store.open(states.get)
+        opened = time.perf_counter() - start
+
+        loads = []
+        for guild_id in range(guilds):
+            start = time.perf_counter()
+            state = await store.load(guild_id)
+            [Track.from_row(row) for row in state["queue"]]
+            loads.append(time.perf_counter() - start)
+        await store.close()
+
+        loads.sort()
+        print(f"  startup (index guild IDs):      {opened * 1000:9.1f} ms")
+        print(f"  lazy restore, per guild:        {loads[len(loads) // 2] * 1000:9.3f} ms median, "
+              f"{loads[int(len(loads) * 0.99)] * 1000:.3f} ms p99")
+        print(f"  restore every guild:            {sum(loads) * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
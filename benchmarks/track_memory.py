@@ -0,0 +1,55 @@
+"""Memory per queued track and queue operation cost: song dicts in a list vs Track + TrackQueue.
+
+Run from the repository root:
+    python -m benchmarks.track_memory [tracks]
+"""
+import sys
+import time
+import tracemalloc
+
+from cogs.utils.track import Track, TrackQueue
+
+
+def make_entry(i: int) -> dict:
+    url = f"https://www.youtube.com/watch?v={i:011d}"
+    return {"title": f"Artist {i % 500} - Song number {i}", "url": url, "webpage_url": url, "duration": 180 + i % 120}
+
+
+def measure(build) -> tuple[object, int]:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    obj = build()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return obj, size
+
+
+def timed(label: str, fn):
+    start = time.perf_counter()
+    fn()
+    print(f"  {label:<34} {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    dicts, dict_bytes = measure(lambda: [make_entry(i) for i in range(n)])
+    tracks, track_bytes = measure(lambda: TrackQueue(Track.from_info(make_entry(i)) for i in range(n)))
+
+    print(f"{n} tracks")
+    print(f"  list[dict]:  {dict_bytes / n:7.1f} bytes/track")
+    print(f"  TrackQueue:  {track_bytes / n:7.1f} bytes/track")
+
+    ops = 10_000
+    print(f"{ops} operations on a {n}-track queue")
+    timed("list.pop(0)", lambda: [dicts.append(dicts.pop(0)) for _ in range(ops)])
+    timed("TrackQueue.popleft()", lambda: [tracks.append(tracks.popleft()) for _ in range(ops)])
+    timed("list.pop(middle)", lambda: [dicts.insert(n // 2, dicts.pop(n // 3)) for _ in range(ops)])
+    timed("TrackQueue.move(middle)", lambda: [tracks.move(n // 3, n // 2) for _ in range(ops)])
+    timed("list[-1000:] page", lambda: [dicts[n - 1000:] for _ in range(100)])
+    timed("TrackQueue[-1000:] page", lambda: [tracks[n - 1000:] for _ in range(100)])
+
+
+if __name__ == "__main__":
+    main()
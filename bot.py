@@ -1,35 +1,71 @@
 import asyncio
 import os
+import time
 
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
 
+from cogs.utils.registry import reload_extension
+
 load_dotenv()
 
-intents = discord.Intents.default()
-intents.message_content = True
-intents.voice_states = True
+EXTENSIONS = ("cogs.music",)
+
+
+def create_bot(shard_ids: list[int] | None = None, shard_count: int | None = None) -> commands.Bot:
+    """The bot, optionally running only some shards (one process of a cluster, see launcher.py)."""
+    intents = discord.Intents.default()
+    intents.message_content = True
+    intents.voice_states = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
+    if shard_ids is None:
+        bot = commands.Bot(command_prefix="!", intents=intents)
+    else:
+        bot = commands.AutoShardedBot(
+            command_prefix="!", intents=intents, shard_ids=shard_ids, shard_count=shard_count
+        )
 
+    @bot.event
+    async def on_ready():
+        startup = f", {time.perf_counter() - bot.started_at:.1f}s after startup" if hasattr(bot, "started_at") else ""
+        print(f"Logged in as {bot.user} (ID: {bot.user.id}){startup}")
 
-@bot.event
-async def on_ready():
-    print(f"Logged in as {bot.user} (ID: {bot.user.id})")
+    @bot.command()
+    @commands.is_owner()
+    async def reload(ctx, extension: str = "cogs.music"):
+        """Reload an extension in place; music keeps playing (owner only).
 
+        Only the extension's own module is reloaded. Changes to cogs/utils/* need a restart.
+        """
+        start = time.perf_counter()
+        await reload_extension(bot, extension)
+        await ctx.send(f"Reloaded `{extension}` in {(time.perf_counter() - start) * 1000:.0f} ms.")
 
-@bot.event
-async def on_command_error(ctx, error):
-    if isinstance(error, commands.CommandNotFound):
-        return
-    await ctx.send(f"Error: {error}")
+    @bot.event
+    async def on_command_error(ctx, error):
+        if isinstance(error, commands.CommandNotFound):
+            return
+        await ctx.send(f"Error: {error}")
 
+    return bot
 
-async def main():
+
+async def run(bot: commands.Bot, extensions: tuple[str, ...] = EXTENSIONS):
+    bot.started_at = time.perf_counter()
     async with bot:
-        await bot.load_extension("cogs.music")
+        for extension in extensions:
+            start = time.perf_counter()
+            await bot.load_extension(extension)
+            print(f"Loaded {extension} in {(time.perf_counter() - start) * 1000:.0f} ms")
         await bot.start(os.getenv("DISCORD_TOKEN"))
 
 
-asyncio.run(main())
+if __name__ == "__main__":
+    from launcher import cluster_processes, launch
+
+    processes = cluster_processes()
+    if processes:
+        launch(processes)
+    else:
+        asyncio.run(run(create_bot()))
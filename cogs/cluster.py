@@ -0,0 +1,113 @@
+import asyncio
+import os
+import signal
+
+from discord.ext import commands
+
+from cogs.utils.registry import reload_extension
+
+try:
+    import resource
+except ImportError:  # not available on Windows; memory is left out of !cluster there
+    resource = None
+
+
+class Cluster(commands.Cog):
+    """Owner commands that span every process of a cluster (see launcher.py)."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.ipc = bot.ipc
+
+    async def cog_load(self):
+        self.ipc.handle("stats", self._stats)
+        self.ipc.handle("reload", self._reload)
+        self.ipc.start(on_lost=self._shutdown)
+        try:
+            # The launcher stops workers with SIGTERM; close properly so state gets saved
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, self._shutdown)
+        except NotImplementedError:
+            pass
+
+    def _shutdown(self):
+        if not self.bot.is_closed():
+            asyncio.ensure_future(self.bot.close())
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        self.ipc.send({"op": "ready"})
+
+    # ── requests from other workers ──────────────────────────
+
+    async def _stats(self, request: dict) -> dict:
+        music = self.bot.get_cog("Music")
+        latencies = [latency for _, latency in getattr(self.bot, "latencies", [])]
+        stats = {
+            "pid": os.getpid(),
+            "shards": self.ipc.shard_ids,
+            "guilds": len(self.bot.guilds),
+            "voice": len(self.bot.voice_clients),
+            "latency": max(latencies, default=self.bot.latency),
+            "playing": len(music.sources) if music else 0,
+            "queued": sum(len(state.queue) for state in music.guilds) if music else 0,
+            "stalls": music.watchdog.stalls if music and music.watchdog else None,
+        }
+        if resource is not None:
+            # ru_maxrss is in KB on Linux
+            stats["rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return stats
+
+    async def _reload(self, request: dict) -> dict:
+        await reload_extension(self.bot, request["extension"])
+        return {"ok": True}
+
+    # ── commands ─────────────────────────────────────────────
+
+    @commands.group(invoke_without_command=True)
+    @commands.is_owner()
+    async def cluster(self, ctx: commands.Context):
+        """Show every worker process and what it's running (owner only)."""
+        replies = sorted(await self.ipc.broadcast({"op": "stats"}), key=lambda r: r["worker"])
+        lines = []
+        for r in replies:
+            if "error" in r:
+                lines.append(f"Worker {r['worker']}: {r['error']}")
+                continue
+            shards = r["shards"]
+            memory = f", {r['rss_mb']:.0f} MB peak" if "rss_mb" in r else ""
+            stalls = f", {r['stalls']} loop stall(s)" if r["stalls"] is not None else ""
+            lines.append(
+                f"Worker {r['worker']} (pid {r['pid']}, shards {shards[0]}-{shards[-1]}): "
+                f"{r['guilds']} servers, {r['voice']} in voice, {r['playing']} playing, "
+                f"{r['queued']} tracks queued, {r['latency'] * 1000:.0f} ms latency{memory}{stalls}"
+            )
+        total_guilds = sum(r.get("guilds", 0) for r in replies)
+        total_voice = sum(r.get("voice", 0) for r in replies)
+        lines.append(f"**{len(replies)}** worker(s) answered: {total_guilds} servers, {total_voice} in voice")
+        await ctx.send("\n".join(lines))
+
+    @cluster.command(name="reload")
+    @commands.is_owner()
+    async def cluster_reload(self, ctx: commands.Context, extension: str = "cogs.music"):
+        """Reload an extension in every worker process (owner only)."""
+        replies = sorted(await self.ipc.broadcast({"op": "reload", "extension": extension}),
+                         key=lambda r: r["worker"])
+        failed = [f"worker {r['worker']}: {r['error']}" for r in replies if "error" in r]
+        message = f"Reloaded `{extension}` in {len(replies) - len(failed)} worker(s)."
+        if failed:
+            message += " Failed in " + "; ".join(failed)
+        await ctx.send(message)
+
+    @cluster.command(name="restart")
+    @commands.is_owner()
+    async def cluster_restart(self, ctx: commands.Context, worker: int):
+        """Restart one worker process; the launcher starts it again right away (owner only)."""
+        # Reply first: if it's this worker, it won't be around to answer afterwards
+        await ctx.send(f"Asking the launcher to restart worker {worker}.")
+        self.ipc.send({"op": "restart", "worker": worker})
+
+
+async def setup(bot: commands.Bot):
+    if getattr(bot, "ipc", None) is None:
+        raise commands.ExtensionError("cogs.cluster only runs under the cluster launcher", name=__name__)
+    await bot.add_cog(Cluster(bot))
@@ -1,16 +1,33 @@
 import asyncio
-import random
+import os
 import re
-from collections import defaultdict
+import threading
+import time
+import weakref
+from collections import deque
+from typing import AsyncIterator, Iterator
+from urllib.parse import quote
 
-import aiohttp
 import discord
 from discord.ext import commands
-import yt_dlp
 
-SPOTIFY_REGEX = re.compile(
-    r"https?://open\.spotify\.com/(track|album|playlist)/([a-zA-Z0-9]+)"
-)
+from cogs.utils.audio import MIXER_AVAILABLE, MixerSource, PrebufferedSource, load_numpy
+from cogs.utils.audiocache import AudioCache
+from cogs.utils.cache import ExtractionCache, TTLCache, stream_expiry
+from cogs.utils.extractor import BACKGROUND, INTERACTIVE, PRIORITY_NAMES, VALIDATE, ExtractionScheduler, is_unavailable
+from cogs.utils.guildstate import GuildState, GuildStates
+from cogs.utils.http import HTTPClient
+from cogs.utils.metrics import Metrics
+from cogs.utils.notify import Notifier, describe_skipped
+from cogs.utils.profiling import LoopWatchdog, sample_stacks, top_frames, write_folded
+from cogs.utils.registry import Registry
+from cogs.utils.search import HedgedSearch, is_plain_query
+from cogs.utils.shuffle import smart_shuffle
+from cogs.utils.spotify import SPOTIFY_REGEX, SpotifyResolver
+from cogs.utils.store import UNCHANGED, GuildStore
+from cogs.utils.track import Track, TrackQueue, format_duration
+
+LYRICS_API_URL = "https://api.lyrics.ovh/v1"
 
 YTDL_OPTIONS = {
     "format": "bestaudio/best",
@@ -31,65 +48,561 @@ YTDL_PLAYLIST_OPTIONS = {
 FFMPEG_BEFORE_OPTS = "-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5"
 FFMPEG_OPTS = "-vn"
 
+# "pcm": decode to PCM and scale volume in Python (discord.py re-encodes every frame).
+# "opus": sources that are already Opus are copied through to Discord untouched at 100%
+# volume (the default in this mode); anything else is played the "pcm" way, which costs
+# less CPU than having FFmpeg re-encode to Opus.
+PLAYBACK_MODE = os.getenv("PLAYBACK_MODE", "pcm").lower()
+
+# Seconds of the next track decoded into memory before the current one ends (0 disables).
+# Costs about 190 KB per second per guild in PCM mode, a few KB per second in Opus mode.
+PREBUFFER_SECONDS = float(os.getenv("PREBUFFER_SECONDS", "3"))
+
+# PCM mode only, and only with NumPy installed: bring every track to a similar loudness
+# (gain is measured once per track and cached), and fade consecutive tracks into each other
+NORMALIZE_LOUDNESS = os.getenv("NORMALIZE_LOUDNESS", "1") != "0"
+CROSSFADE_SECONDS = float(os.getenv("CROSSFADE_SECONDS", "0"))
+USE_MIXER = PLAYBACK_MODE == "pcm" and MIXER_AVAILABLE and (NORMALIZE_LOUDNESS or CROSSFADE_SECONDS > 0)
+# How long a measured track gain is remembered
+TRACK_GAIN_TTL = 7 * 24 * 3600
+
+# Local Opus copies of tracks that get replayed ("" disables)
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", "")
+AUDIO_CACHE_MAX_MB = int(os.getenv("AUDIO_CACHE_MAX_MB", "2048"))
+# A track is cached once it has been played this many times
+AUDIO_CACHE_MIN_PLAYS = int(os.getenv("AUDIO_CACHE_MIN_PLAYS", "2"))
+
+# How many upcoming queue entries to resolve in the background while a track plays
+PREFETCH_DEPTH = int(os.getenv("PREFETCH_DEPTH", "2"))
+# Max number of keys (queries and page URLs) kept in the shared extraction cache
+EXTRACT_CACHE_SIZE = int(os.getenv("EXTRACT_CACHE_SIZE", "4096"))
+# Threads dedicated to yt-dlp; extraction never touches the loop's default executor.
+# Lookups mostly wait on the network, so this is sized for throughput, not CPU cores.
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "16"))
+# Separate threads for enumerating playlists, which hold a thread until the last page is in
+PLAYLIST_WORKERS = int(os.getenv("PLAYLIST_WORKERS", "2"))
+
+# How free-text searches are run: "off" lets yt-dlp pick (YouTube), "hedged" asks the next
+# source in SEARCH_SOURCES only if the previous one is slow, "parallel" asks all of them at once
+SEARCH_MODE = os.getenv("SEARCH_MODE", "hedged").lower()
+SEARCH_SOURCES = [s.strip() for s in os.getenv("SEARCH_SOURCES", "ytsearch,scsearch").split(",") if s.strip()]
+
+# Queued playlist entries checked at once per guild, ahead of time and below prefetch
+# priority, so unplayable ones are dropped before playback reaches them (0 disables)
+VALIDATE_CONCURRENCY = int(os.getenv("VALIDATE_CONCURRENCY", "2"))
+# ...and across all guilds, so many big queues can't take over the extraction pool
+VALIDATE_LIMIT = int(os.getenv("VALIDATE_LIMIT", "4"))
+# Entries picked up per pass of the validator
+VALIDATE_BATCH = 25
+# After lookups failed for reasons that may pass (throttling, network), wait this long before walking the queue again
+VALIDATE_RETRY_SECONDS = 60
+
+# Playlist entries are queued in batches of this size while the playlist is still loading
+PLAYLIST_BATCH_SIZE = 50
+# Minimum seconds between edits of the "Added N tracks" message
+PLAYLIST_EDIT_INTERVAL = 2.0
+
+# SQLite file that guild queues/settings are saved to so they survive restarts ("" disables)
+STATE_DB = os.getenv("STATE_DB", "music_state.db")
+# Seconds between batched writes of changed guild state
+STATE_FLUSH_INTERVAL = 5.0
+# extras= for commands that only show things, so they don't mark the guild for saving
+READ_ONLY = {"read_only": True}
+
+# Guild state untouched for this long while not in voice is dropped from memory (after
+# being saved to STATE_DB, if enabled, so it comes back on next use). 0 keeps everything.
+GUILD_IDLE_MINUTES = float(os.getenv("GUILD_IDLE_MINUTES", "30"))
+# Seconds between sweeps for idle guilds
+GUILD_SWEEP_INTERVAL = 60
+
+# Metrics: served in Prometheus format at http://METRICS_HOST:METRICS_PORT/metrics and/or
+# dumped as JSON to METRICS_FILE every METRICS_DUMP_INTERVAL seconds. Off unless one is set.
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_FILE = os.getenv("METRICS_FILE", "")
+METRICS_DUMP_INTERVAL = 30
+
+METRIC_DESCRIPTIONS = {
+    "music_time_to_first_audio_seconds": "From a !play command to its first audio frame.",
+    "music_track_gap_seconds": "From the end of one track to the first frame of the next.",
+    "music_extraction_seconds": "yt-dlp lookups that missed the cache, by kind (single, search, playlist).",
+    "music_ffmpeg_processes": "FFmpeg processes running, for playback or for the audio cache.",
+    "music_extraction_queue_depth": "yt-dlp jobs waiting for a worker, by priority.",
+    "music_extraction_busy_workers": "yt-dlp workers running a job.",
+    "music_queue_tracks": "Tracks queued, per guild.",
+    "music_voice_sources": "Guilds with a track playing or paused.",
+    "music_loop_lag_seconds": "How late the event loop ran a timer, sampled every 100 ms.",
+}
+
+# Log what was running whenever the event loop is blocked for longer than this. 0 disables it.
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD_MS", "250")) / 1000
+# Where !profile writes its results, and how long it may run
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+MAX_PROFILE_SECONDS = 120
+PROFILE_INTERVAL = 0.005
+
+# Tracks per page of !queue
+QUEUE_PAGE_SIZE = 15
+
+# Spotify album/playlist tracks resolved at once per load
+SPOTIFY_FANOUT = 4
+
+# Queues at least this long are shuffled on a worker thread instead of the event loop
+SHUFFLE_THREAD_THRESHOLD = 5000
+
+
+class QueueView(discord.ui.View):
+    """Previous/next buttons for a paginated !queue message."""
+
+    def __init__(self, cog: "Music", guild_id: int, page: int):
+        super().__init__(timeout=120)
+        self.cog = cog
+        self.guild_id = guild_id
+        self.page = page
+        self.message: discord.Message | None = None
+
+    async def _show(self, interaction: discord.Interaction, page: int):
+        # Re-render from live state; the queue may have moved on since the last click
+        content, pages = self.cog._render_queue_page(self.guild_id, page)
+        self.page = min(max(page, 1), pages)
+        await interaction.response.edit_message(content=content, view=self)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page - 1)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.page + 1)
+
+    async def on_timeout(self):
+        if self.message is not None:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass
+
+
+def _track_ended(registry: Registry, guild: discord.Guild, source: discord.AudioSource, error: Exception | None):
+    """After-callback of every track (runs on the voice thread).
+
+    Goes through whichever Music instance is loaded now (subclasses included), so
+    tracks started before a reload still advance the queue. Mid-reload there is
+    none; the next instance catches up in cog_load.
+    """
+    cog = registry.cog
+    if cog is not None:
+        cog._play_next(guild, source, error)
+
 
 class Music(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.queues: dict[int, list[dict]] = {}      # guild_id -> list of song dicts
-        self.now_playing: dict[int, dict | None] = {} # guild_id -> current song dict
-        self.volumes: dict[int, float] = {}           # guild_id -> volume (0.0–1.0)
-        self.loop_mode: dict[int, str] = {}           # guild_id -> "off" | "track" | "queue"
-        self.text_channels: dict[int, discord.abc.Messageable] = {}  # guild_id -> text channel
+        self.init_started = time.perf_counter()
+        self.load_seconds: float | None = None
+        # Kept on the bot, so queues and current playback survive reload_extension
+        self.registry = Registry.of(bot, "music")
+        self.guilds = self.registry.get("guilds", GuildStates)  # queue, settings and playback position per guild
+        self.notifier = Notifier()  # now-playing/skip messages, sent off the playback path
+        self.prefetch: dict[int, dict[str, asyncio.Task]] = {}  # guild_id -> song key -> resolve task
+        self.prefetch_stats = {"hidden": 0, "waited": 0, "missed": 0}
+        self.extract_cache = self.registry.get(  # shared by all guilds
+            "extract_cache", lambda: ExtractionCache(maxsize=EXTRACT_CACHE_SIZE)
+        )
+        self.extractor = ExtractionScheduler(workers=EXTRACT_WORKERS, long_workers=PLAYLIST_WORKERS)
+        self.search = (
+            HedgedSearch(self.extractor, YTDL_OPTIONS, SEARCH_SOURCES, SEARCH_MODE,
+                         accept=lambda data: not self._is_preview(data))
+            if SEARCH_MODE != "off" and SEARCH_SOURCES else None
+        )
+        self.ingestions: dict[int, list[asyncio.Task]] = {}  # guild_id -> playlists still loading
+        self.validators: dict[int, asyncio.Task] = {}  # guild_id -> background check of queued entries
+        self.validate_stats = {"checked": 0, "removed": 0, "deferred": 0}
+        self.validate_retry_at: dict[int, float] = {}  # guild_id -> monotonic() before which not to validate
+        self.validate_slots = asyncio.Semaphore(VALIDATE_LIMIT)  # validator lookups running, all guilds
+        # guild_id -> source whose end should advance the queue
+        self.sources: dict[int, discord.AudioSource] = self.registry.get("sources", dict)
+        self.prebuffers: dict[int, tuple[str, PrebufferedSource, float]] = {}  # guild_id -> (track key, buffer, volume)
+        self.prebuffer_timers: dict[int, asyncio.TimerHandle] = {}
+        self.prebuffer_stats = {"ready": 0, "warming": 0, "cold": 0}
+        self.crossfade_timers: dict[int, asyncio.TimerHandle] = {}
+        # track key -> loudness gain
+        self.track_gains = self.registry.get("track_gains", lambda: TTLCache(maxsize=EXTRACT_CACHE_SIZE))
+        self.audio_cache = (
+            AudioCache(AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_MB * 1024 * 1024, min_plays=AUDIO_CACHE_MIN_PLAYS)
+            if AUDIO_CACHE_DIR else None
+        )
+        self.store = GuildStore(STATE_DB, flush_interval=STATE_FLUSH_INTERVAL) if STATE_DB else None
+        # guild_id -> lazy load of saved state
+        self.restoring: dict[int, asyncio.Task] = self.registry.get("restoring", dict)
+        self.restore_failed: set[int] = self.registry.get("restore_failed", set)  # saved state couldn't be loaded
+        self.http = HTTPClient()  # shared by Spotify and lyrics lookups; closed on unload
+        self.spotify = SpotifyResolver(self.http)
+        self.sweeper: asyncio.Task | None = None
+        self.ffmpeg_sources: weakref.WeakSet[discord.AudioSource] = self.registry.get("ffmpeg_sources", weakref.WeakSet)
+        self.metrics = Metrics(enabled=bool(METRICS_PORT or METRICS_FILE), descriptions=METRIC_DESCRIPTIONS)
+        self.metrics.add_collector(self._collect_metrics)
+        self.watchdog = (
+            LoopWatchdog(LOOP_LAG_THRESHOLD, on_lag=self._record_lag if self.metrics.enabled else None)
+            if LOOP_LAG_THRESHOLD > 0 else None
+        )
+        self.profiling = False
+
+    async def cog_load(self):
+        self.extractor.start()
+        self.extractor.warm_up(YTDL_OPTIONS)
+        if USE_MIXER:
+            asyncio.create_task(asyncio.to_thread(load_numpy))
+        if self.store:
+            await self.store.open(self._snapshot)
+        if GUILD_IDLE_MINUTES:
+            self.sweeper = asyncio.create_task(self._sweep_loop())
+        if METRICS_PORT:
+            await self.metrics.serve(METRICS_HOST, METRICS_PORT)
+        if METRICS_FILE:
+            self.metrics.dump_every(METRICS_FILE, METRICS_DUMP_INTERVAL)
+        if self.watchdog:
+            self.watchdog.start()
+
+        self.registry.loads += 1
+        self.registry.cog = self
+        if self.registry.unloaded_at is not None:
+            # Once cog_load returns and the bot has added this instance
+            asyncio.get_running_loop().call_soon(self._resume_after_reload)
+        self.load_seconds = time.perf_counter() - self.init_started
+
+    def _resume_after_reload(self):
+        """Pick up guilds that kept playing while the previous instance of the cog was swapped out."""
+        for guild_id in list(self.sources):
+            guild = self.bot.get_guild(guild_id)
+            vc = guild.voice_client if guild else None
+            if vc is None:
+                self.sources.pop(guild_id, None)
+            elif vc.is_playing() or vc.is_paused():
+                # Background work was cancelled with the old instance; start it again
+                self._schedule_prefetch(guild_id)
+                self._schedule_prebuffer(guild)
+                self._schedule_crossfade(guild)
+            else:
+                # The track ended during the reload, with no cog around to start the next one
+                asyncio.create_task(self._play_next_async(guild))
+        print(
+            f"Music reloaded in {(time.perf_counter() - self.registry.unloaded_at) * 1000:.0f} ms: "
+            f"{len(self.guilds)} guild(s) kept, {len(self.sources)} still playing"
+        )
+
+    async def cog_unload(self):
+        if self.registry.cog is self:
+            self.registry.cog = None  # tracks ending from here on are caught up by the next instance
+        if self.watchdog:
+            self.watchdog.stop()
+        if self.sweeper:
+            self.sweeper.cancel()
+        for guild_id in list(self.prefetch):
+            self._cancel_prefetch(guild_id)
+        for guild_id in list(self.ingestions):
+            self._cancel_ingestion(guild_id)
+        for guild_id in list(self.validators):
+            self._cancel_validation(guild_id)
+        self.notifier.close()
+        for guild_id in list(self.prebuffers) + list(self.prebuffer_timers):
+            self._discard_prebuffer(guild_id)
+        for timer in self.crossfade_timers.values():
+            timer.cancel()
+        self.crossfade_timers.clear()
+        await self.metrics.close()
+        await self.extractor.close()
+        if self.audio_cache:
+            await self.audio_cache.close()
+        await self.http.close()
+        if self.store:
+            await self.store.close()
+        self.registry.unloaded_at = time.perf_counter()
+
+    async def cog_before_invoke(self, ctx: commands.Context):
+        if self.watchdog:
+            where = f"guild {ctx.guild.id}" if ctx.guild else "DMs"
+            self.watchdog.tag(asyncio.current_task(), f"!{ctx.command.qualified_name} in {where}")
+        if ctx.guild:
+            self._state(ctx.guild.id).touch()
+            await self._ensure_restored(ctx.guild.id)
+
+    async def cog_after_invoke(self, ctx: commands.Context):
+        if ctx.guild and not ctx.command.extras.get("read_only"):
+            self._mark_dirty(ctx.guild.id)
+
+    # ── persistence ──────────────────────────────────────────
+
+    def _mark_dirty(self, guild_id: int):
+        # An evicted guild was saved on the way out; snapshotting it now would save defaults
+        if self.store and guild_id in self.guilds:
+            self.store.mark_dirty(guild_id)
+
+    def _snapshot(self, guild_id: int) -> dict | None:
+        """State worth keeping across restarts, None if the guild is back to defaults, or UNCHANGED."""
+        if guild_id in self.restore_failed:
+            return UNCHANGED  # what's stored was never loaded; don't overwrite it with defaults
+        state = self.guilds.peek(guild_id)
+        if state is None:
+            return UNCHANGED  # evicted (saved first) or never loaded; nothing new to write
+        fingerprint = state.fingerprint()
+        if fingerprint == state.saved:
+            return UNCHANGED
+        state.saved = fingerprint
+        return state.to_dict()
+
+    async def _ensure_restored(self, guild_id: int):
+        """Load a guild's saved state the first time it's needed after startup."""
+        if self.store is None:
+            return
+        task = self.restoring.get(guild_id)
+        if task is None:
+            task = self.restoring[guild_id] = asyncio.create_task(self._restore(guild_id))
+        await task
+
+    async def _restore(self, guild_id: int):
+        try:
+            state = await self.store.load(guild_id)
+        except Exception as e:
+            print(f"Failed to load saved state for guild {guild_id}: {e}")
+            # Not saved until a later command manages to load it
+            self.restore_failed.add(guild_id)
+            self.restoring.pop(guild_id, None)
+            return
+        self.restore_failed.discard(guild_id)
+        if not state:
+            return
+
+        self._state(guild_id).load(state, self.bot.get_channel)
+        self._state(guild_id).saved = self._state(guild_id).fingerprint()  # matches what's stored
+
+    # ── idle eviction ────────────────────────────────────────
+
+    def _is_busy(self, guild_id: int) -> bool:
+        """Whether anything is still playing, loading or scheduled for a guild."""
+        guild = self.bot.get_guild(guild_id)
+        if guild is not None and guild.voice_client is not None:
+            return True
+        restoring = self.restoring.get(guild_id)
+        if restoring is not None and not restoring.done():
+            return True
+        return bool(
+            self.ingestions.get(guild_id) or self.validators.get(guild_id) or self.prefetch.get(guild_id)
+            or guild_id in self.sources or guild_id in self.prebuffers
+        )
+
+    async def _sweep_idle(self):
+        """Drop the state of guilds that have been idle for GUILD_IDLE_MINUTES."""
+        max_idle = GUILD_IDLE_MINUTES * 60
+        idle = [guild_id for guild_id in self.guilds.idle(max_idle) if not self._is_busy(guild_id)]
+        if not idle:
+            return
+        if self.store:
+            # Spill to disk first; _ensure_restored brings the state back on next use
+            for guild_id in idle:
+                self.store.mark_dirty(guild_id)
+            await self.store.flush()
+        # Anything used while we were writing stays
+        for guild_id in set(idle) & set(self.guilds.idle(max_idle)):
+            if self._is_busy(guild_id):
+                continue
+            self.guilds.evict(guild_id, spilled=self.store is not None)
+            self.restoring.pop(guild_id, None)
+            self.prefetch.pop(guild_id, None)
+            self.validate_retry_at.pop(guild_id, None)
+            self.notifier.forget(guild_id)
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(GUILD_SWEEP_INTERVAL)
+            try:
+                await self._sweep_idle()
+            except Exception as e:
+                print(f"Failed to evict idle guilds: {e}")
 
     # ── helpers ──────────────────────────────────────────────
 
-    def _get_queue(self, guild_id: int) -> list[dict]:
-        return self.queues.setdefault(guild_id, [])
-
-    async def _resolve_spotify(self, url: str) -> list[str]:
-        """Convert Spotify URLs to YouTube search queries via oEmbed."""
-        match = SPOTIFY_REGEX.match(url)
-        if not match:
-            return [url]
-
-        kind = match.group(1)
-
-        if kind == "track":
-            oembed_url = f"https://open.spotify.com/oembed?url={url}"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(oembed_url) as resp:
-                    if resp.status != 200:
-                        raise commands.CommandError("Could not fetch Spotify track info.")
-                    data = await resp.json()
-            # oEmbed title is "track name - artist"
-            return [f"ytsearch:{data['title']}"]
-
-        # For albums/playlists, we'd need the full Spotify API.
-        raise commands.CommandError(
-            "Only Spotify track links are supported. "
-            "Album and playlist links require Spotify API credentials."
+    def _state(self, guild_id: int) -> GuildState:
+        return self.guilds.get(guild_id)
+
+    def _get_queue(self, guild_id: int) -> TrackQueue:
+        return self.guilds.get(guild_id).queue
+
+    @staticmethod
+    def _playlist_entry(entry: dict) -> Track:
+        """Build a minimal track from a flat playlist entry."""
+        return Track(
+            entry.get("title") or "Unknown",
+            entry.get("url", entry.get("webpage_url", "")),
+            entry.get("webpage_url", entry.get("url", "")),
+            entry.get("duration") or 0,
         )
 
-    async def _extract_playlist(self, url: str) -> list[dict]:
-        """Extract all entries from a playlist URL. Returns a list of minimal dicts."""
-        ytdl = yt_dlp.YoutubeDL(YTDL_PLAYLIST_OPTIONS)
-        loop = asyncio.get_event_loop()
-        data = await loop.run_in_executor(None, lambda: ytdl.extract_info(url, download=False))
+    def _start_ingestion(self, ctx: commands.Context, batches: AsyncIterator[list[Track]], label: str,
+                         started: float | None = None):
+        """Load tracks in the background; it can be cancelled with !stop or !clear."""
+        running = self.ingestions.setdefault(ctx.guild.id, [])
+        task = asyncio.create_task(
+            self._ingest(ctx, batches, label, previous=running[-1] if running else None, started=started)
+        )
+        running.append(task)
+
+        def forget(t: asyncio.Task):
+            if t in running:
+                running.remove(t)
+            if not running and self.ingestions.get(ctx.guild.id) is running:
+                del self.ingestions[ctx.guild.id]
+
+        task.add_done_callback(forget)
+
+    def _cancel_ingestion(self, guild_id: int):
+        for task in self.ingestions.pop(guild_id, []):
+            task.cancel()
+
+    async def _ingest(self, ctx: commands.Context, batches: AsyncIterator[list[Track]], label: str,
+                      previous: asyncio.Task | None = None, started: float | None = None):
+        """Add tracks to the queue as they arrive, starting playback with the first one.
+
+        ``started`` is when the command came in, for the time-to-first-audio metric.
+        """
+        guild = ctx.guild
+        # Loads requested back to back keep their order in the queue
+        if previous is not None:
+            await asyncio.wait([previous])
+
+        added = 0
+        message = None
+        last_edit = 0.0
+        try:
+            async for batch in batches:
+                self._get_queue(guild.id).extend(batch)
+                added += len(batch)
+                self._mark_dirty(guild.id)
 
-        if "entries" not in data:
-            return []
+                # Start playing if nothing is currently playing
+                vc = guild.voice_client
+                if vc and not vc.is_playing() and not vc.is_paused() and not self._state(guild.id).now_playing:
+                    # Use the normal playback chain which handles Go+ skipping. It resolves the
+                    # first track itself, at interactive priority, before anything is prefetched.
+                    timing = ("music_time_to_first_audio_seconds", started) if started is not None else None
+                    await self._play_next_async(guild, timing=timing)
+                started = None  # only the first track counts, even if it didn't start one
+                self._schedule_prefetch(guild.id)
+
+                if message is None:
+                    message = await ctx.send(f"Added **{added}** tracks from {label} to the queue (loading more...)")
+                    last_edit = time.monotonic()
+                elif time.monotonic() - last_edit >= PLAYLIST_EDIT_INTERVAL:
+                    await message.edit(content=f"Added **{added}** tracks from {label} to the queue (loading more...)")
+                    last_edit = time.monotonic()
+        except asyncio.CancelledError:
+            if message is not None:
+                await message.edit(content=f"Stopped loading the {label} after **{added}** tracks.")
+            raise
+        except Exception as e:
+            if message is None:
+                return await ctx.send(f"Failed to extract {label}: {e}")
+            return await message.edit(
+                content=f"Added **{added}** tracks from {label} to the queue, then loading failed: {e}"
+            )
+        finally:
+            await batches.aclose()
 
-        entries = []
-        for entry in data["entries"]:
-            if entry is None:
-                continue
-            entries.append({
-                "title": entry.get("title", "Unknown"),
-                "url": entry.get("url", entry.get("webpage_url", "")),
-                "webpage_url": entry.get("webpage_url", entry.get("url", "")),
-                "duration": entry.get("duration", 0),
-            })
-        return entries
+        if message is not None:
+            await message.edit(content=f"Added **{added}** tracks from {label} to the queue.")
+        else:
+            await ctx.send(f"No tracks found in that {label}.")
+
+    async def _playlist_batches(self, url: str, guild_id: int) -> AsyncIterator[list[Track]]:
+        """Yield a playlist's entries in batches while yt-dlp is still enumerating it."""
+        loop = asyncio.get_running_loop()
+        cancelled = threading.Event()
+        batches: asyncio.Queue = asyncio.Queue()
+
+        def push(item):
+            try:
+                loop.call_soon_threadsafe(batches.put_nowait, item)
+            except RuntimeError:
+                cancelled.set()  # event loop is gone
+
+        entries: Iterator | None = None
+        size = 1  # the first entry goes out alone so playback can start right away
+
+        def enumerate_step(ytdl) -> bool:
+            # Runs on a long-job worker, one batch per call; returns whether there's more.
+            # process=False keeps yt-dlp's entry generator lazy, so pages are only
+            # fetched as the batches need them.
+            nonlocal entries, size
+            try:
+                if entries is None:
+                    data = ytdl.extract_info(url, download=False, process=False)
+                    if data.get("_type") in ("url", "url_transparent"):
+                        data = ytdl.extract_info(data["url"], download=False, process=False)
+                    entries = iter(data.get("entries") or [])
+
+                batch, flushed = [], time.monotonic()
+                for entry in entries:
+                    if cancelled.is_set():
+                        return False
+                    if entry is None:
+                        continue
+                    batch.append(self._playlist_entry(entry))
+                    if len(batch) >= size or time.monotonic() - flushed >= PLAYLIST_EDIT_INTERVAL:
+                        push(batch)
+                        size = PLAYLIST_BATCH_SIZE
+                        return True
+                if batch:
+                    push(batch)
+            except Exception as e:
+                push(e)
+            push(None)
+            return False
+
+        started = time.monotonic()
+        # Other guilds' playlists get a turn between batches
+        job = asyncio.create_task(self.extractor.submit_long(enumerate_step, YTDL_PLAYLIST_OPTIONS, guild_id))
+        try:
+            while (batch := await batches.get()) is not None:
+                if isinstance(batch, Exception):
+                    raise batch
+                if started is not None:
+                    # Until the first entries are in hand, which is what holds up playback
+                    self.metrics.observe("music_extraction_seconds", time.monotonic() - started, kind="playlist")
+                    started = None
+                yield batch
+        finally:
+            cancelled.set()
+            job.cancel()
+
+    async def _spotify_batches(self, url: str, guild_id: int) -> AsyncIterator[list[Track]]:
+        """Resolve a Spotify album/playlist with bounded fan-out, yielding tracks in order.
+
+        Tracks that can't be found (or are Go+ previews) are skipped.
+        """
+        queries = enumerate(await self.spotify.resolve(url))
+        pending: deque[asyncio.Task] = deque()
+
+        def fill():
+            while len(pending) < SPOTIFY_FANOUT and (item := next(queries, None)) is not None:
+                i, query = item
+                # Someone is waiting for the first track to start; the rest can queue behind other guilds
+                priority = INTERACTIVE if i == 0 else BACKGROUND
+                pending.append(asyncio.create_task(self._extract_info(query, guild_id, priority)))
+
+        try:
+            fill()
+            while pending:
+                task = pending.popleft()
+                try:
+                    info = await task
+                except Exception:
+                    info = None
+                fill()
+                if info and not info.get("is_preview"):
+                    yield [Track.from_info(info)]
+        finally:
+            for task in pending:
+                task.cancel()
 
     @staticmethod
     def _is_playlist_url(query: str) -> bool:
@@ -102,98 +615,628 @@ class Music(commands.Cog):
             return True
         return False
 
-    async def _extract_info(self, query: str) -> dict:
-        """Run yt-dlp extraction in a thread so we don't block the event loop."""
+    async def _extract_info(self, query: str, guild_id: int | None = None, priority: int = INTERACTIVE,
+                            cache: bool = True) -> dict:
+        """Run yt-dlp extraction on the extraction pool so we don't block the event loop.
+
+        With ``cache`` off the result is still looked up in the extraction cache but not added to it.
+        What the queue validator found for ``guild_id`` is used too, if the cache has nothing fresher.
+        """
         # Resolve Spotify URLs to a YouTube search query
         if SPOTIFY_REGEX.match(query):
-            queries = await self._resolve_spotify(query)
+            queries = await self.spotify.resolve(query)
             query = queries[0]
 
-        ytdl = yt_dlp.YoutubeDL(YTDL_OPTIONS)
-        loop = asyncio.get_event_loop()
-        data = await loop.run_in_executor(None, lambda: ytdl.extract_info(query, download=False))
-
-        # If a search returned a playlist of results, take the first one
-        if "entries" in data:
-            data = data["entries"][0]
-
-        return {
+        cached, fresh = self.extract_cache.get(query)
+        if not fresh and guild_id is not None and (state := self.guilds.peek(guild_id)) is not None:
+            checked = state.validated.get(query)
+            if checked is not None:
+                now = time.time()
+                if stream_expiry(checked["url"], now) > now:
+                    return dict(checked)
+                cached = cached or checked
+        if cached and fresh:
+            return cached
+        # A stale entry still knows the page URL, so skip the search and just refresh the stream
+        target = cached["webpage_url"] if cached else query
+
+        started = time.monotonic()
+        if self.search and is_plain_query(target):
+            data = await self.search.search(target, guild_id, priority)
+        else:
+            data = await self.extractor.extract(target, YTDL_OPTIONS, guild_id, priority, key=query)
+            # If a search returned a playlist of results, take the first one
+            if "entries" in data:
+                data = data["entries"][0]
+        kind = "single" if target.startswith(("http://", "https://")) else "search"
+        self.metrics.observe("music_extraction_seconds", time.monotonic() - started, kind=kind)
+
+        info = {
             "title": data.get("title", "Unknown"),
             "url": data["url"],                       # direct audio stream URL
-            "webpage_url": data.get("webpage_url", query),
+            "webpage_url": data.get("webpage_url", target),
             "duration": data.get("duration", 0),
-            "is_preview": "preview" in (data.get("format_id") or ""),
+            "is_preview": self._is_preview(data),
+            "codec": data.get("acodec"),
         }
+        if cache:
+            self.extract_cache.put(query, info)
+        return dict(info)
+
+    @staticmethod
+    def _is_preview(data: dict) -> bool:
+        """SoundCloud Go+ tracks only serve a 30 second preview."""
+        return "preview" in (data.get("format_id") or "")
 
-    def _play_next(self, guild: discord.Guild):
+    @staticmethod
+    def _needs_resolve(song: Track) -> bool:
+        """Flat playlist entries only carry a page URL, not a direct stream URL."""
+        url = song.url
+        return not url.startswith("http") or "manifest" not in url and "googlevideo" not in url
+
+    def _upcoming(self, guild_id: int) -> list[Track]:
+        """The songs that will play next, in order, given the current loop mode."""
+        mode = self._state(guild_id).loop_mode
+        if mode == "track":
+            return []
+        upcoming = self._get_queue(guild_id)[:PREFETCH_DEPTH]
+        current = self._state(guild_id).now_playing
+        if mode == "queue" and current and len(upcoming) < PREFETCH_DEPTH:
+            upcoming.append(current)
+        return upcoming
+
+    def _schedule_prefetch(self, guild_id: int):
+        """Resolve the next few queue entries in the background.
+
+        Call this whenever something changes what plays next; stale lookups are cancelled.
+        """
+        pending = self.prefetch.setdefault(guild_id, {})
+        wanted = {song.key for song in self._upcoming(guild_id) if self._needs_resolve(song)}
+
+        for key in list(pending):
+            if key not in wanted:
+                pending.pop(key).cancel()
+
+        for key in wanted:
+            if key not in pending:
+                task = asyncio.create_task(self._extract_info(key, guild_id, BACKGROUND))
+                # Failures are handled when the song is reached; don't log them here
+                task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                pending[key] = task
+
+        self._check_prebuffer(guild_id)
+        self._schedule_validation(guild_id)
+
+    def _cancel_prefetch(self, guild_id: int):
+        for task in self.prefetch.pop(guild_id, {}).values():
+            task.cancel()
+
+    # ── queue validation ─────────────────────────────────────
+
+    def _schedule_validation(self, guild_id: int):
+        """Make sure the background validator is walking this guild's queue."""
+        if not VALIDATE_CONCURRENCY or guild_id in self.validators or not self._get_queue(guild_id):
+            return
+        if time.monotonic() < self.validate_retry_at.get(guild_id, 0):
+            return
+        self.validate_retry_at.pop(guild_id, None)
+        task = asyncio.create_task(self._validate_queue(guild_id))
+        self.validators[guild_id] = task
+
+        def forget(t: asyncio.Task):
+            if self.validators.get(guild_id) is t:
+                del self.validators[guild_id]
+            if not t.cancelled() and t.exception():
+                print(f"Queue validation failed: {t.exception()}")
+
+        task.add_done_callback(forget)
+
+    def _cancel_validation(self, guild_id: int):
+        task = self.validators.pop(guild_id, None)
+        if task:
+            task.cancel()
+        state = self.guilds.peek(guild_id)
+        if state is not None:
+            state.forget_valid()
+
+    async def _validate_queue(self, guild_id: int):
+        """Resolve queued playlist entries ahead of time and drop the ones that can't play.
+
+        Lookups go through _extract_info below prefetch priority, a few at a time per
+        guild and overall. Their results are kept in the guild's ``validated`` map rather
+        than the shared extraction cache, where a big playlist would push everyone else's
+        lookups out; when an entry comes up, its stream URL is reused if it hasn't expired
+        and otherwise its page URL is re-resolved, skipping any search. Only entries
+        yt-dlp reports as gone for good are dropped; if lookups fail for other reasons
+        (throttling, network) the walk stops and is tried again later, and those entries
+        are left for play time.
+        """
+        state = self._state(guild_id)
+        checked = state.validated
+        semaphore = asyncio.Semaphore(VALIDATE_CONCURRENCY)
+
+        async def check(song: Track) -> str | dict | Exception:
+            async with semaphore, self.validate_slots:
+                try:
+                    info = await self._extract_info(song.key, guild_id, VALIDATE, cache=False)
+                except Exception as e:
+                    return "unavailable or restricted" if is_unavailable(e) else e
+            return "Go+ preview" if info["is_preview"] else info
+
+        # Where the last pass stopped. Entries that moved behind it (playback, removals,
+        # shuffles) are picked up by one last pass from the front.
+        position = 0
+        while True:
+            queue = self._get_queue(guild_id)
+            # The next few entries are the prefetcher's; play time deals with those
+            prefetching = self.prefetch.get(guild_id, {})
+            from_front = position == 0
+            batch = []
+            for song in queue.iter_from(min(position, len(queue))):
+                position += 1
+                if self._needs_resolve(song) and song.key not in checked and song.key not in prefetching:
+                    batch.append(song)
+                    if len(batch) == VALIDATE_BATCH:
+                        break
+            if not batch:
+                if from_front:
+                    break
+                position = 0
+                continue
+
+            results = await asyncio.gather(*(check(song) for song in batch))
+            self.validate_stats["checked"] += len(batch)
+            bad = [(song, result) for song, result in zip(batch, results) if isinstance(result, str)]
+            failed = [result for result in results if isinstance(result, Exception)]
+            for song, result in zip(batch, results):
+                if isinstance(result, dict):
+                    state.mark_valid(song.key, result)
+
+            if bad:
+                # The queue may have changed while we waited; only drop what's still in it
+                removed = {id(song) for song in queue.remove_all(song for song, _ in bad)}
+                bad = [(song, reason) for song, reason in bad if id(song) in removed]
+            if bad:
+                position = max(position - len(bad), 0)
+                self.validate_stats["removed"] += len(bad)
+                self._mark_dirty(guild_id)
+                self._schedule_prefetch(guild_id)
+                removed_titles = [(song.title, reason) for song, reason in bad]
+                self.notifier.notice(
+                    guild_id, self._state(guild_id).text_channel,
+                    describe_skipped(removed_titles, "Removed", " from the queue"),
+                )
+            if failed:
+                # Most likely throttled; more lookups now would only make it worse
+                self.validate_stats["deferred"] += len(failed)
+                self.validate_retry_at[guild_id] = time.monotonic() + VALIDATE_RETRY_SECONDS
+                print(f"Queue validation for guild {guild_id} paused after {len(failed)} failed lookup(s): {failed[0]}")
+                break
+
+        # Forget keys that have left the queue, so the map doesn't outgrow it
+        state.forget_valid({song.key for song in self._get_queue(guild_id)})
+
+    def _ffmpeg_source(self, guild_id: int, key: str, url: str, codec: str | None,
+                       position: float = 0) -> discord.AudioSource:
+        """FFmpeg source for a stream URL, or its cached copy: passed-through Opus if possible, else PCM."""
+        volume = self._state(guild_id).volume
+        before_options = FFMPEG_BEFORE_OPTS
+
+        # A cached copy is a local Opus file: no reconnect options needed, and seeking is instant
+        cached = self.audio_cache.lookup(key) if self.audio_cache else None
+        if cached:
+            url, codec, before_options = cached, "opus", ""
+        if position:
+            before_options = f"{before_options} -ss {position}".strip()
+
+        if PLAYBACK_MODE == "opus" and codec == "opus" and volume == 1.0:
+            # Already Opus and nothing to change: no decoding at all
+            source = discord.FFmpegOpusAudio(url, codec="copy", before_options=before_options, options=FFMPEG_OPTS)
+        else:
+            # Re-encoding in FFmpeg would cost more than decoding to PCM and encoding in-process
+            source = discord.FFmpegPCMAudio(url, before_options=before_options, options=FFMPEG_OPTS)
+        self.ffmpeg_sources.add(source)  # for the process count in metrics
+        return source
+
+    def _make_source(self, guild_id: int, song: Track, position: float = 0,
+                     raw: discord.AudioSource | None = None) -> discord.AudioSource:
+        if raw is None:
+            raw = self._ffmpeg_source(guild_id, song.key, song.url, song.codec, position)
+        if raw.is_opus():
+            return raw
+        if USE_MIXER:
+            return MixerSource(
+                raw, volume=self._state(guild_id).volume, gain=self.track_gains.get(song.key),
+                on_gain=self._gain_recorder(song.key), normalize=NORMALIZE_LOUDNESS,
+            )
+        return discord.PCMVolumeTransformer(raw, volume=self._state(guild_id).volume)
+
+    def _ffmpeg_processes(self) -> int:
+        """Playback FFmpeg processes still running (finished sources linger until collected)."""
+        running = 0
+        for source in list(self.ffmpeg_sources):
+            process = getattr(source, "_process", None)
+            if process is not None and process.poll() is None:
+                running += 1
+        return running
+
+    def _collect_metrics(self):
+        """Gauges for Metrics, computed when something scrapes or dumps them."""
+        yield "music_ffmpeg_processes", {"role": "playback"}, self._ffmpeg_processes()
+        yield "music_ffmpeg_processes", {"role": "cache"}, self.audio_cache.fetching if self.audio_cache else 0
+        pool = self.extractor.stats()
+        for name in PRIORITY_NAMES.values():
+            yield "music_extraction_queue_depth", {"priority": name}, pool[name]["queued"]
+        yield "music_extraction_busy_workers", {}, pool["busy"]
+        yield "music_voice_sources", {}, len(self.sources)
+        for state in self.guilds:
+            if state.queue:
+                yield "music_queue_tracks", {"guild": state.guild_id}, len(state.queue)
+
+    def _record_lag(self, lag: float):
+        self.metrics.observe("music_loop_lag_seconds", lag)
+
+    def _timer(self, name: str, since: float):
+        """Callback (runs on the voice thread) that observes the time elapsed since ``since``."""
+        loop = self.bot.loop
+        return lambda: loop.call_soon_threadsafe(self.metrics.observe, name, time.monotonic() - since)
+
+    def _gain_recorder(self, key: str):
+        """Callback for MixerSource (runs on the voice thread) that caches a track's gain."""
+        loop = self.bot.loop
+        return lambda gain: loop.call_soon_threadsafe(self.track_gains.put, key, gain, TRACK_GAIN_TTL)
+
+    def _start_playback(self, guild: discord.Guild, song: Track, position: float = 0,
+                        crossfade: bool = False, timing: tuple[str, float] | None = None):
+        """Play a track from ``position``, replacing whatever is playing now.
+
+        With ``crossfade``, a track playing through a MixerSource fades out into
+        this one instead of being cut off. ``timing`` is a metric name and the
+        monotonic time to measure from; it is observed when the first frame goes out.
+        """
+        vc = guild.voice_client
+        current = self.sources.get(guild.id)
+        if crossfade and isinstance(current, MixerSource) and vc.is_playing():
+            raw = self._take_prebuffer(guild.id, song)
+            if raw is None:
+                # The mixer only starts fading once the new track has audio, so buffer it
+                raw = PrebufferedSource(self._ffmpeg_source(guild.id, song.key, song.url, song.codec),
+                                        max_frames=self._prebuffer_frames())
+            current.crossfade_to(
+                raw, frames=int(CROSSFADE_SECONDS * 50), gain=self.track_gains.get(song.key),
+                on_gain=self._gain_recorder(song.key),
+            )
+        else:
+            raw = self._take_prebuffer(guild.id, song) if not position else None
+            source = self._make_source(guild.id, song, position, raw)
+            # Set before stopping, so the replaced source's after-callback knows it's stale
+            self.sources[guild.id] = source
+            if timing is not None:
+                self.metrics.probe_first_frame(source, self._timer(*timing))
+            if vc.is_playing() or vc.is_paused():
+                vc.stop()
+            vc.play(source, after=lambda e, registry=self.registry: _track_ended(registry, guild, source, e))
+        self._mark_started(guild.id, position)
+        self._schedule_prebuffer(guild)
+        self._schedule_crossfade(guild)
+        if self.audio_cache and not position:
+            self.audio_cache.record_play(song.key, song.url, song.duration, song.codec)
+
+    def _stop_playback(self, guild: discord.Guild):
+        """Stop the current track without advancing the queue."""
+        self.sources.pop(guild.id, None)
+        self._discard_prebuffer(guild.id)
+        timer = self.crossfade_timers.pop(guild.id, None)
+        if timer:
+            timer.cancel()
+        if guild.voice_client:
+            guild.voice_client.stop()
+
+    # ── pre-buffering ────────────────────────────────────────
+
+    def _next_track(self, guild_id: int) -> Track | None:
+        """The track _play_next_async will pick when the current one ends."""
+        current = self._state(guild_id).now_playing
+        if self._state(guild_id).loop_mode == "track" and current:
+            return current
+        upcoming = self._upcoming(guild_id)
+        return upcoming[0] if upcoming else None
+
+    @staticmethod
+    def _prebuffer_lead() -> float:
+        """Seconds before the end of a track that the next one starts decoding."""
+        # With a crossfade the next track has to be ready before the fade, not the end
+        return PREBUFFER_SECONDS + (CROSSFADE_SECONDS if USE_MIXER else 0)
+
+    @staticmethod
+    def _prebuffer_frames() -> int:
+        return max(int(PREBUFFER_SECONDS * 50), 50)  # 20 ms frames
+
+    def _schedule_prebuffer(self, guild: discord.Guild):
+        """Arrange for the next track to start decoding PREBUFFER_SECONDS before this one ends."""
+        timer = self.prebuffer_timers.pop(guild.id, None)
+        if timer:
+            timer.cancel()
+        current = self._state(guild.id).now_playing
+        lead = self._prebuffer_lead()
+        if not lead or not current or not current.duration:
+            return
+        delay = current.duration - self._position(guild.id) - lead
+        self.prebuffer_timers[guild.id] = self.bot.loop.call_later(max(delay, 0), self._start_prebuffer, guild)
+
+    def _start_prebuffer(self, guild: discord.Guild):
+        self.prebuffer_timers.pop(guild.id, None)
+        vc = guild.voice_client
+        current = self._state(guild.id).now_playing
+        if not vc or not current:
+            return
+        # Paused, resumed or seeked since the timer was set: check again later
+        if vc.is_paused() or current.duration - self._position(guild.id) > self._prebuffer_lead() + 1:
+            self.prebuffer_timers[guild.id] = self.bot.loop.call_later(1, self._schedule_prebuffer, guild)
+            return
+
+        song = self._next_track(guild.id)
+        pending = self.prebuffers.get(guild.id)
+        if song is None or pending and pending[0] == song.key:
+            return
+
+        stream = self._stream_of(guild.id, song)
+        if stream is None:
+            return
+        url, codec = stream
+
+        self._discard_prebuffer(guild.id)
+        raw = self._ffmpeg_source(guild.id, song.key, url, codec)
+        buffer = PrebufferedSource(raw, max_frames=self._prebuffer_frames())
+        self.prebuffers[guild.id] = (song.key, buffer, self._state(guild.id).volume)
+
+    def _stream_of(self, guild_id: int, song: Track) -> tuple[str, str | None] | None:
+        """``(url, codec)`` of a queued track if known without waiting, else None."""
+        if not self._needs_resolve(song):
+            return song.url, song.codec
+        # Only a finished prefetch gives us a stream URL without waiting
+        task = self.prefetch.get(guild_id, {}).get(song.key)
+        if task is None or not task.done() or task.cancelled() or task.exception():
+            return None
+        info = task.result()
+        return info["url"], info.get("codec")
+
+    def _take_prebuffer(self, guild_id: int, song: Track) -> PrebufferedSource | None:
+        pending = self.prebuffers.pop(guild_id, None)
+        if pending is not None:
+            key, buffer, volume = pending
+            # Opus sources have the volume baked in, so a volume change makes them stale
+            if key == song.key and (not buffer.is_opus() or volume == self._state(guild_id).volume):
+                self.prebuffer_stats["ready" if buffer.ready else "warming"] += 1
+                return buffer
+            buffer.cleanup()
+        self.prebuffer_stats["cold"] += 1
+        return None
+
+    def _discard_prebuffer(self, guild_id: int):
+        timer = self.prebuffer_timers.pop(guild_id, None)
+        if timer:
+            timer.cancel()
+        pending = self.prebuffers.pop(guild_id, None)
+        if pending is not None:
+            pending[1].cleanup()
+
+    def _check_prebuffer(self, guild_id: int):
+        """Drop the pre-buffered track if something changed what plays next."""
+        pending = self.prebuffers.get(guild_id)
+        if pending is None:
+            return
+        song = self._next_track(guild_id)
+        if song is None or song.key != pending[0]:
+            buffer = self.prebuffers.pop(guild_id)[1]
+            buffer.cleanup()
+
+    def _buffered_bytes(self, guild_id: int) -> int:
+        """Memory held in pre-buffers for a guild: the pending next track plus the playing one."""
+        total = 0
+        pending = self.prebuffers.get(guild_id)
+        if pending is not None:
+            total += pending[1].buffered_bytes
+        source = self.sources.get(guild_id)
+        source = getattr(source, "original", source)  # unwrap PCMVolumeTransformer
+        if isinstance(source, (PrebufferedSource, MixerSource)):
+            total += source.buffered_bytes
+        return total
+
+    # ── crossfade ────────────────────────────────────────────
+
+    def _schedule_crossfade(self, guild: discord.Guild):
+        """Arrange for the next track to fade in CROSSFADE_SECONDS before this one ends."""
+        timer = self.crossfade_timers.pop(guild.id, None)
+        if timer:
+            timer.cancel()
+        current = self._state(guild.id).now_playing
+        if not CROSSFADE_SECONDS or not isinstance(self.sources.get(guild.id), MixerSource):
+            return
+        if not current or current.duration <= CROSSFADE_SECONDS * 2:
+            return
+        delay = current.duration - self._position(guild.id) - CROSSFADE_SECONDS
+        self.crossfade_timers[guild.id] = self.bot.loop.call_later(max(delay, 0), self._start_crossfade, guild)
+
+    def _start_crossfade(self, guild: discord.Guild):
+        self.crossfade_timers.pop(guild.id, None)
+        vc = guild.voice_client
+        current = self._state(guild.id).now_playing
+        if not vc or not current or not isinstance(self.sources.get(guild.id), MixerSource):
+            return
+        remaining = current.duration - self._position(guild.id)
+        # Paused, resumed or seeked since the timer was set: check again later
+        if vc.is_paused() or remaining > CROSSFADE_SECONDS + 1:
+            self.crossfade_timers[guild.id] = self.bot.loop.call_later(1, self._schedule_crossfade, guild)
+            return
+        # Too late to fade, or the next track isn't resolved yet: let this one end normally
+        song = self._next_track(guild.id)
+        if not vc.is_playing() or remaining < 0.5 or song is None or self._stream_of(guild.id, song) is None:
+            return
+        asyncio.ensure_future(self._play_next_async(guild, crossfade=True))
+
+    def _play_next(self, guild: discord.Guild, source: discord.AudioSource, error: Exception | None):
         """Callback: when a track ends, play the next one in queue."""
+        if error:
+            print(f"Player error: {error}")
+            return
+        if self.sources.get(guild.id) is not source:
+            return  # replaced by a seek/volume restart or stopped on purpose
+        ended = time.monotonic()
         # Schedule the async version from the callback thread
-        asyncio.run_coroutine_threadsafe(self._play_next_async(guild), self.bot.loop)
+        asyncio.run_coroutine_threadsafe(
+            self._play_next_async(guild, timing=("music_track_gap_seconds", ended)), self.bot.loop
+        )
 
-    async def _play_next_async(self, guild: discord.Guild):
-        """Async handler for advancing to the next track."""
-        mode = self.loop_mode.get(guild.id, "off")
-        current = self.now_playing.get(guild.id)
+    async def _play_next_async(self, guild: discord.Guild, crossfade: bool = False,
+                               timing: tuple[str, float] | None = None):
+        """Async handler for advancing to the next track.
+
+        With ``crossfade`` the current track is still playing and fades into the next
+        one; if there is nothing to fade into, it is left to end on its own.
+        ``timing`` is passed on to _start_playback.
+        """
+        self._state(guild.id).touch()
+        self._mark_dirty(guild.id)
+        mode = self._state(guild.id).loop_mode
+        current = self._state(guild.id).now_playing
         queue = self._get_queue(guild.id)
-
-        if mode == "track" and current:
-            song = current
-        elif mode == "queue" and current:
-            queue.append(current)
-            song = queue.pop(0)
-        elif queue:
-            song = queue.pop(0)
-        else:
-            self.now_playing[guild.id] = None
+        skipped: list[tuple[Track, str]] = []
+
+        # Walk forward until something can play; unplayable tracks are dropped along the way
+        while True:
+            if mode == "track" and current:
+                song = current
+            elif mode == "queue" and current:
+                queue.append(current)
+                song = queue.popleft()
+            elif queue:
+                song = queue.popleft()
+            else:
+                song = None
+                break
+            task = self.prefetch.get(guild.id, {}).pop(song.key, None)
+            reason = await self._prepare(guild.id, song, task)
+            if reason is None:
+                break
+            skipped.append((song, reason))
+            current = None  # never loop back to (or re-queue) a track that can't play
+            # Keep the prefetcher ahead of us in case the next few are dead too
+            self._schedule_prefetch(guild.id)
+
+        self.notifier.skipped(guild.id, self._state(guild.id).text_channel,
+                              [(song.title, reason) for song, reason in skipped])
+
+        if song is None:
+            if crossfade:
+                return  # the current track is still playing; let it end on its own
+            self._state(guild.id).now_playing = None
+            self.sources.pop(guild.id, None)
+            if self.ingestions.get(guild.id):
+                # A playlist is still loading; it restarts playback when its next batch lands
+                return
             if guild.voice_client:
                 await guild.voice_client.disconnect()
             return
 
+        if not guild.voice_client:
+            self._state(guild.id).now_playing = None
+            self.sources.pop(guild.id, None)
+            return
+
+        self._state(guild.id).now_playing = song
+        self._start_playback(guild, song, crossfade=crossfade, timing=timing)
+        self._schedule_prefetch(guild.id)
+
+        self.notifier.now_playing(
+            guild.id, self._state(guild.id).text_channel,
+            f"Now playing: **{song.title}** [{self._format_duration(song.duration)}]",
+        )
+
+    async def _prepare(self, guild_id: int, song: Track, task: asyncio.Task | None = None) -> str | None:
+        """Resolve a track's stream URL if needed, using its prefetch ``task`` if there is one.
+
+        Returns why the track can't play, or None if it can.
+        """
         # Resolve stream URL for flat-extracted playlist entries
-        if not song["url"].startswith("http") or "manifest" not in song["url"] and "googlevideo" not in song["url"]:
+        if self._needs_resolve(song):
+            if task is not None and task.cancelled():
+                task = None
             try:
-                resolved = await self._extract_info(song.get("webpage_url") or song["url"])
+                if task is not None:
+                    # A finished prefetch means the track change has no resolution gap
+                    self.prefetch_stats["hidden" if task.done() else "waited"] += 1
+                    if not task.done():
+                        # Someone is listening for this one now; don't leave it behind background work
+                        self.extractor.promote(song.key)
+                    resolved = await task
+                else:
+                    self.prefetch_stats["missed"] += 1
+                    resolved = await self._extract_info(song.key, guild_id)
                 song.update(resolved)
             except Exception:
-                # Notify and skip unresolvable tracks
-                text_ch = self.text_channels.get(guild.id)
-                if text_ch:
-                    await text_ch.send(f"Skipping **{song['title']}** (unavailable or restricted).")
-                await self._play_next_async(guild)
-                return
-
-        # Skip Go+ preview tracks
-        if song.get("is_preview"):
-            text_ch = self.text_channels.get(guild.id)
-            if text_ch:
-                await text_ch.send(f"Skipping **{song['title']}** (Go+ preview).")
-            await self._play_next_async(guild)
-            return
+                return "unavailable or restricted"
+
+        if song.is_preview:
+            return "Go+ preview"
+        return None
+
+    _format_duration = staticmethod(format_duration)
+
+    def _mark_started(self, guild_id: int, position: float = 0):
+        state = self._state(guild_id)
+        state.play_started = time.monotonic() - position
+        state.paused_at = None
+
+    def _position(self, guild_id: int) -> float:
+        """Seconds into the current track."""
+        state = self._state(guild_id)
+        if state.play_started is None:
+            return 0.0
+        return (state.paused_at or time.monotonic()) - state.play_started
+
+    def _render_queue_page(self, guild_id: int, page: int) -> tuple[str, int]:
+        """Render one page of the queue. Returns ``(content, page_count)``."""
+        current = self._state(guild_id).now_playing
+        queue = self._get_queue(guild_id)
+        pages = max(1, -(-len(queue) // QUEUE_PAGE_SIZE))
+        page = min(max(page, 1), pages)
+        start = (page - 1) * QUEUE_PAGE_SIZE
 
-        if not guild.voice_client:
-            self.now_playing[guild.id] = None
-            return
-
-        self.now_playing[guild.id] = song
-        source = discord.FFmpegPCMAudio(song["url"], before_options=FFMPEG_BEFORE_OPTS, options=FFMPEG_OPTS)
-        source = discord.PCMVolumeTransformer(source, volume=self.volumes.get(guild.id, 0.5))
-        guild.voice_client.play(source, after=lambda e: self._play_next(guild) if not e else print(f"Player error: {e}"))
+        lines = []
+        remaining = 0.0
+        if current:
+            if current.duration:
+                position = min(self._position(guild_id), current.duration)
+                remaining = current.duration - position
+                elapsed = self._format_duration(position) if position >= 1 else "0:00"
+                lines.append(f"**Now playing:** {current.title} [{elapsed} / {self._format_duration(current.duration)}]")
+            else:
+                lines.append(f"**Now playing:** {current.title} [{self._format_duration(0)}]")
+
+        # Running totals come from the queue itself, so a page costs O(page size).
+        # There's nothing to count down from while a live stream is playing.
+        show_eta = not current or bool(current.duration)
+        until = remaining + queue.duration_before(start)
+        for i, song in enumerate(queue.iter_from(start), start=start + 1):
+            if i > start + QUEUE_PAGE_SIZE:
+                break
+            if show_eta:
+                eta = f"in {self._format_duration(until)}" if until >= 1 else "up next"
+                lines.append(f"`{i}.` {song.line} · {eta}")
+            else:
+                lines.append(f"`{i}.` {song.line}")
+            until += song.duration
 
-        # Notify the text channel
-        text_ch = self.text_channels.get(guild.id)
-        if text_ch:
-            await text_ch.send(
-                f"Now playing: **{song['title']}** [{self._format_duration(song['duration'])}]"
+        if queue:
+            lines.append(
+                f"*{len(queue)} songs, {self._format_duration(queue.total_duration)} total* · "
+                f"Page {page}/{pages}"
             )
+        elif current:
+            lines.append("*No more songs in queue.*")
 
-    @staticmethod
-    def _format_duration(seconds: int | float) -> str:
-        if not seconds:
-            return "Live / Unknown"
-        seconds = int(seconds)
-        m, s = divmod(seconds, 60)
-        h, m = divmod(m, 60)
-        return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
+        return "\n".join(lines), pages
 
     # ── commands ─────────────────────────────────────────────
 
@@ -203,7 +1246,8 @@ class Music(commands.Cog):
         if not ctx.author.voice:
             return await ctx.send("You need to be in a voice channel.")
 
-        self.text_channels[ctx.guild.id] = ctx.channel
+        started = time.monotonic()
+        self._state(ctx.guild.id).text_channel = ctx.channel
         channel = ctx.author.voice.channel
 
         # Connect if not already in voice
@@ -214,57 +1258,54 @@ class Music(commands.Cog):
 
         async with ctx.typing():
             # Handle playlist URLs
-            if self._is_playlist_url(query):
-                try:
-                    entries = await self._extract_playlist(query)
-                except Exception as e:
-                    return await ctx.send(f"Failed to extract playlist: {e}")
-
-                if not entries:
-                    return await ctx.send("No tracks found in that playlist.")
-
-                queue = self._get_queue(ctx.guild.id)
-                queue.extend(entries)
-                await ctx.send(f"Added **{len(entries)}** tracks from playlist to the queue.")
+            spotify = SPOTIFY_REGEX.match(query)
+            if spotify and spotify.group(1) != "track":
+                kind = spotify.group(1)
+                self._start_ingestion(ctx, self._spotify_batches(query, ctx.guild.id), f"Spotify {kind}", started)
+                return
 
-                # Start playing if nothing is currently playing
-                if ctx.voice_client and not ctx.voice_client.is_playing() and not ctx.voice_client.is_paused():
-                    # Use the normal playback chain which handles Go+ skipping
-                    await self._play_next_async(ctx.guild)
+            if self._is_playlist_url(query):
+                self._start_ingestion(ctx, self._playlist_batches(query, ctx.guild.id), "playlist", started)
                 return
 
             # Single track
             try:
-                song = await self._extract_info(query)
+                song = Track.from_info(await self._extract_info(query, ctx.guild.id))
             except Exception as e:
                 return await ctx.send(f"Failed to extract audio: {e}")
 
-            if song.get("is_preview"):
-                return await ctx.send(f"**{song['title']}** is a Go+ track and can't be played.")
+            if song.is_preview:
+                return await ctx.send(f"**{song.title}** is a Go+ track and can't be played.")
 
             queue = self._get_queue(ctx.guild.id)
+            if ctx.voice_client is None:
+                # The last track ended (and the bot left) while this one was being looked up
+                await channel.connect()
 
             if ctx.voice_client.is_playing() or ctx.voice_client.is_paused():
                 queue.append(song)
+                self._schedule_prefetch(ctx.guild.id)
                 await ctx.send(
-                    f"Added to queue (#{len(queue)}): **{song['title']}** "
-                    f"[{self._format_duration(song['duration'])}]"
+                    f"Added to queue (#{len(queue)}): **{song.title}** "
+                    f"[{self._format_duration(song.duration)}]"
                 )
             else:
-                self.now_playing[ctx.guild.id] = song
-                source = discord.FFmpegPCMAudio(song["url"], before_options=FFMPEG_BEFORE_OPTS, options=FFMPEG_OPTS)
-                source = discord.PCMVolumeTransformer(source, volume=self.volumes.get(ctx.guild.id, 0.5))
-                ctx.voice_client.play(source, after=lambda e: self._play_next(ctx.guild) if not e else print(f"Player error: {e}"))
-                await ctx.send(
-                    f"Now playing: **{song['title']}** "
-                    f"[{self._format_duration(song['duration'])}]"
+                self._state(ctx.guild.id).now_playing = song
+                self._start_playback(ctx.guild, song, timing=("music_time_to_first_audio_seconds", started))
+                self._schedule_prefetch(ctx.guild.id)
+                message = await ctx.send(
+                    f"Now playing: **{song.title}** "
+                    f"[{self._format_duration(song.duration)}]"
                 )
+                # The next track change edits this message instead of posting a new one
+                self.notifier.track_message(ctx.guild.id, message)
 
     @commands.command()
     async def pause(self, ctx: commands.Context):
         """Pause the current track."""
         if ctx.voice_client and ctx.voice_client.is_playing():
             ctx.voice_client.pause()
+            self._state(ctx.guild.id).paused_at = time.monotonic()
             await ctx.send("Paused.")
         else:
             await ctx.send("Nothing is playing.")
@@ -274,7 +1315,20 @@ class Music(commands.Cog):
         """Resume the current track."""
         if ctx.voice_client and ctx.voice_client.is_paused():
             ctx.voice_client.resume()
+            state = self._state(ctx.guild.id)
+            if state.paused_at is not None and state.play_started is not None:
+                state.play_started += time.monotonic() - state.paused_at
+            state.paused_at = None
             await ctx.send("Resumed.")
+        elif not (ctx.voice_client and ctx.voice_client.is_playing()) and self._get_queue(ctx.guild.id):
+            # Pick up a queue saved before the last restart
+            if not ctx.author.voice:
+                return await ctx.send("You need to be in a voice channel.")
+            if ctx.voice_client is None:
+                await ctx.author.voice.channel.connect()
+            self._state(ctx.guild.id).text_channel = ctx.channel
+            await ctx.send(f"Resuming the queue ({len(self._get_queue(ctx.guild.id))} songs).")
+            await self._play_next_async(ctx.guild)
         else:
             await ctx.send("Nothing is paused.")
 
@@ -290,55 +1344,40 @@ class Music(commands.Cog):
     @commands.command()
     async def stop(self, ctx: commands.Context):
         """Stop playback, clear the queue, and leave the voice channel."""
+        self._cancel_ingestion(ctx.guild.id)
         self._get_queue(ctx.guild.id).clear()
-        self.now_playing[ctx.guild.id] = None
+        self._cancel_prefetch(ctx.guild.id)
+        self._cancel_validation(ctx.guild.id)
+        self.notifier.forget(ctx.guild.id)
+        self._state(ctx.guild.id).now_playing = None
         if ctx.voice_client:
-            ctx.voice_client.stop()
+            self._stop_playback(ctx.guild)
             await ctx.voice_client.disconnect()
             await ctx.send("Stopped and disconnected.")
         else:
             await ctx.send("Not connected to voice.")
 
-    @commands.command()
-    async def queue(self, ctx: commands.Context):
-        """Show the current song queue."""
-        current = self.now_playing.get(ctx.guild.id)
-        queue = self._get_queue(ctx.guild.id)
-
-        if not current and not queue:
+    @commands.command(extras=READ_ONLY)
+    async def queue(self, ctx: commands.Context, page: int = 1):
+        """Show the current song queue, one page at a time."""
+        if not self._state(ctx.guild.id).now_playing and not self._get_queue(ctx.guild.id):
             return await ctx.send("The queue is empty.")
 
-        lines = []
-        if current:
-            lines.append(
-                f"**Now playing:** {current['title']} "
-                f"[{self._format_duration(current['duration'])}]"
-            )
-
-        shown = 0
-        for i, song in enumerate(queue, start=1):
-            line = f"`{i}.` {song['title']} [{self._format_duration(song['duration'])}]"
-            # Keep total message under Discord's 2000 char limit
-            if len("\n".join(lines + [line])) > 1900:
-                lines.append(f"*...and {len(queue) - shown} more songs.*")
-                break
-            lines.append(line)
-            shown += 1
+        content, pages = self._render_queue_page(ctx.guild.id, page)
+        if pages == 1:
+            return await ctx.send(content)
+        view = QueueView(self, ctx.guild.id, min(max(page, 1), pages))
+        view.message = await ctx.send(content, view=view)
 
-        if not queue and current:
-            lines.append("*No more songs in queue.*")
-
-        await ctx.send("\n".join(lines))
-
-    @commands.command(aliases=["np"])
+    @commands.command(aliases=["np"], extras=READ_ONLY)
     async def nowplaying(self, ctx: commands.Context):
         """Show the currently playing track."""
-        current = self.now_playing.get(ctx.guild.id)
+        current = self._state(ctx.guild.id).now_playing
         if current:
             await ctx.send(
-                f"Now playing: **{current['title']}** "
-                f"[{self._format_duration(current['duration'])}]\n"
-                f"{current['webpage_url']}"
+                f"Now playing: **{current.title}** "
+                f"[{self._format_duration(current.duration)}]\n"
+                f"{current.webpage_url}"
             )
         else:
             await ctx.send("Nothing is playing right now.")
@@ -347,79 +1386,50 @@ class Music(commands.Cog):
     async def volume(self, ctx: commands.Context, level: int = None):
         """Set volume (0–100). Shows current volume if no value given."""
         if level is None:
-            current = int(self.volumes.get(ctx.guild.id, 0.5) * 100)
+            current = int(self._state(ctx.guild.id).volume * 100)
             return await ctx.send(f"Volume: **{current}%**")
 
         if not 0 <= level <= 100:
             return await ctx.send("Volume must be between 0 and 100.")
 
-        self.volumes[ctx.guild.id] = level / 100
-        if ctx.voice_client and ctx.voice_client.source:
-            ctx.voice_client.source.volume = level / 100
+        self._state(ctx.guild.id).volume = level / 100
+        vc = ctx.voice_client
+        if vc and isinstance(vc.source, (discord.PCMVolumeTransformer, MixerSource)):
+            vc.source.volume = level / 100
+        elif vc and vc.is_playing() and self._state(ctx.guild.id).now_playing:
+            # A passed-through Opus stream can't change volume; restart it as PCM from the same spot
+            self._start_playback(ctx.guild, self._state(ctx.guild.id).now_playing, self._position(ctx.guild.id))
         await ctx.send(f"Volume set to **{level}%**.")
 
-    @staticmethod
-    def _smart_shuffle(queue: list[dict]) -> None:
-        """Shuffle queue while spacing out tracks from the same artist/uploader."""
-        if len(queue) < 2:
-            return
-
-        def get_artist(song: dict) -> str:
-            title = song.get("title", "")
-            # Most YouTube/SoundCloud titles use "Artist - Title" format
-            if " - " in title:
-                return title.split(" - ", 1)[0].strip().lower()
-            return title.strip().lower()
-
-        # Group tracks by artist
-        groups: dict[str, list[dict]] = defaultdict(list)
-        for song in queue:
-            groups[get_artist(song)].append(song)
-
-        # Shuffle within each artist group for randomness
-        for tracks in groups.values():
-            random.shuffle(tracks)
-
-        # Sort groups largest-first so the most common artists get placed first
-        # (they need the most precise spacing)
-        sorted_groups = sorted(groups.values(), key=len, reverse=True)
-
-        total = len(queue)
-        result: list[dict | None] = [None] * total
-        taken = [False] * total
-
-        for group in sorted_groups:
-            count = len(group)
-            spacing = total / count
-            # Random offset within the first interval so the pattern isn't predictable
-            offset = random.random() * spacing
-
-            for i, track in enumerate(group):
-                ideal = int(round(offset + i * spacing)) % total
-                # Find the nearest free slot to the ideal position
-                for delta in range(total):
-                    pos = (ideal + delta) % total
-                    if not taken[pos]:
-                        result[pos] = track
-                        taken[pos] = True
-                        break
-
-        queue.clear()
-        queue.extend(result)
-
     @commands.command()
     async def shuffle(self, ctx: commands.Context):
         """Smart-shuffle the queue, spacing out tracks from the same artist."""
         queue = self._get_queue(ctx.guild.id)
         if len(queue) < 2:
             return await ctx.send("Not enough songs in the queue to shuffle.")
-        self._smart_shuffle(queue)
-        await ctx.send(f"Shuffled **{len(queue)}** songs.")
+
+        snapshot = list(queue)
+        if len(snapshot) < SHUFFLE_THREAD_THRESHOLD:
+            shuffled = smart_shuffle(snapshot)
+        else:
+            # Big queues are shuffled off the event loop so playback elsewhere doesn't stutter
+            shuffled = await asyncio.to_thread(smart_shuffle, snapshot)
+
+            # Tracks may have been added (e.g. by a loading playlist) while we were away;
+            # keep them after the shuffled part, but give up if anything else changed.
+            if len(queue) < len(snapshot) or any(a is not b for a, b in zip(queue, snapshot)):
+                return await ctx.send("The queue changed while shuffling. Try again.")
+            shuffled.extend(queue.iter_from(len(snapshot)))
+
+        queue.clear()
+        queue.extend(shuffled)
+        self._schedule_prefetch(ctx.guild.id)
+        await ctx.send(f"Shuffled **{len(snapshot)}** songs.")
 
     @commands.command()
     async def loop(self, ctx: commands.Context, mode: str = None):
         """Toggle loop mode: off, track, or queue."""
-        current = self.loop_mode.get(ctx.guild.id, "off")
+        current = self._state(ctx.guild.id).loop_mode
 
         if mode is None:
             # Cycle: off -> track -> queue -> off
@@ -430,7 +1440,8 @@ class Music(commands.Cog):
         if mode not in ("off", "track", "queue"):
             return await ctx.send("Valid modes: `off`, `track`, `queue`.")
 
-        self.loop_mode[ctx.guild.id] = mode
+        self._state(ctx.guild.id).loop_mode = mode
+        self._schedule_prefetch(ctx.guild.id)
         labels = {"off": "Looping disabled.", "track": "Looping current track.", "queue": "Looping entire queue."}
         await ctx.send(labels[mode])
 
@@ -440,7 +1451,7 @@ class Music(commands.Cog):
         if not ctx.voice_client or not ctx.voice_client.is_playing():
             return await ctx.send("Nothing is playing.")
 
-        current = self.now_playing.get(ctx.guild.id)
+        current = self._state(ctx.guild.id).now_playing
         if not current:
             return await ctx.send("Nothing is playing.")
 
@@ -461,37 +1472,30 @@ class Music(commands.Cog):
             return await ctx.send("Invalid timestamp format.")
 
         # Restart the stream with an FFmpeg seek offset
-        ctx.voice_client.stop()
-        seek_opts = f"{FFMPEG_BEFORE_OPTS} -ss {seconds}"
-        source = discord.FFmpegPCMAudio(current["url"], before_options=seek_opts, options=FFMPEG_OPTS)
-        source = discord.PCMVolumeTransformer(source, volume=self.volumes.get(ctx.guild.id, 0.5))
-        ctx.voice_client.play(source, after=lambda e: self._play_next(ctx.guild) if not e else print(f"Player error: {e}"))
+        self._start_playback(ctx.guild, current, seconds)
         await ctx.send(f"Seeked to **{timestamp}**.")
 
-    @commands.command()
+    @commands.command(extras=READ_ONLY)
     async def lyrics(self, ctx: commands.Context, *, query: str = None):
         """Fetch lyrics for the current track or a given search term."""
         if query is None:
-            current = self.now_playing.get(ctx.guild.id)
+            current = self._state(ctx.guild.id).now_playing
             if not current:
                 return await ctx.send("Nothing is playing. Provide a song name to search.")
-            query = current["title"]
+            query = current.title
 
         async with ctx.typing():
-            search_url = f"https://api.lyrics.ovh/v1/{query}"
             # Try splitting "Artist - Title" format
             if " - " in query:
                 artist, title = query.split(" - ", 1)
-                search_url = f"https://api.lyrics.ovh/v1/{artist}/{title}"
             else:
                 # Use artist as empty, title as query
-                search_url = f"https://api.lyrics.ovh/v1/_/{query}"
+                artist, title = "_", query
+            search_url = f"{LYRICS_API_URL}/{quote(artist.strip(), safe='')}/{quote(title.strip(), safe='')}"
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(search_url) as resp:
-                    if resp.status != 200:
-                        return await ctx.send(f"Could not find lyrics for **{query}**.")
-                    data = await resp.json()
+            status, data = await self.http.get_json(search_url)
+            if status != 200:
+                return await ctx.send(f"Could not find lyrics for **{query}**.")
 
             text = data.get("lyrics")
             if not text:
@@ -506,9 +1510,11 @@ class Music(commands.Cog):
     @commands.command()
     async def clear(self, ctx: commands.Context):
         """Clear the queue without stopping the current song."""
+        self._cancel_ingestion(ctx.guild.id)
         queue = self._get_queue(ctx.guild.id)
         count = len(queue)
         queue.clear()
+        self._schedule_prefetch(ctx.guild.id)
         await ctx.send(f"Cleared **{count}** song(s) from the queue.")
 
     @commands.command()
@@ -517,10 +1523,145 @@ class Music(commands.Cog):
         queue = self._get_queue(ctx.guild.id)
         if 1 <= index <= len(queue):
             removed = queue.pop(index - 1)
-            await ctx.send(f"Removed **{removed['title']}** from the queue.")
+            self._schedule_prefetch(ctx.guild.id)
+            await ctx.send(f"Removed **{removed.title}** from the queue.")
         else:
             await ctx.send(f"Invalid index. Queue has {len(queue)} song(s).")
 
+    @commands.command(extras=READ_ONLY)
+    @commands.is_owner()
+    async def stats(self, ctx: commands.Context):
+        """Show playback performance counters (owner only)."""
+        hidden = self.prefetch_stats["hidden"]
+        changes = hidden + self.prefetch_stats["waited"] + self.prefetch_stats["missed"]
+        ratio = hidden / changes * 100 if changes else 0
+        pool = self.extractor.stats()
+        lines = [
+            f"Prefetch depth: **{PREFETCH_DEPTH}**",
+            f"Gap hidden on **{hidden}/{changes}** resolved track changes ({ratio:.0f}%), "
+            f"{self.prefetch_stats['waited']} waited on a running prefetch, "
+            f"{self.prefetch_stats['missed']} resolved from scratch.",
+            f"Queue validation: {self.validate_stats['checked']} entries checked ahead of time, "
+            f"{self.validate_stats['removed']} unplayable removed, "
+            f"{self.validate_stats['deferred']} left for later after failed lookups, "
+            f"{len(self.validators)} guild(s) in progress",
+            f"Extraction cache: **{len(self.extract_cache)}** keys, "
+            f"{self.extract_cache.hits} hits, {self.extract_cache.stale} stale refreshes, "
+            f"{self.extract_cache.misses} misses",
+            f"Extraction pool: {pool['busy']}/{pool['workers']} busy, {pool['completed']} done; "
+            f"{pool['long_jobs']} playlist(s) loading on {pool['long_workers']} dedicated worker(s)",
+        ]
+        for name in PRIORITY_NAMES.values():
+            stats = pool[name]
+            lines.append(
+                f"  {name}: {stats['queued']} queued across {stats['guilds']} guild(s), "
+                f"wait avg {stats['avg_wait']:.2f}s / max {stats['max_wait']:.2f}s"
+            )
+        if self.search:
+            search = self.search
+            lines.append(
+                f"Search ({search.mode}): {search.searches} searches, {search.hedges} needed a second source, "
+                f"hedge delay {search.hedge_delay():.2f}s"
+            )
+            for source, stats in search.stats.items():
+                p50, p95 = stats.percentile(0.5), stats.percentile(0.95)
+                latency = f"p50 {p50:.2f}s / p95 {p95:.2f}s" if p50 is not None else "no samples"
+                lines.append(
+                    f"  {source}: {stats.started} asked, {stats.wins} won, {stats.failures} failed, "
+                    f"{stats.rejected} unplayable; {latency}"
+                )
+        guilds = self.guilds.report()
+        lines.append(
+            f"Guild state: {guilds['live']} live ({guilds['live_bytes'] / 1024:.0f} KB), "
+            f"{guilds['evicted']} evicted while idle ({guilds['spilled']} saved to disk, "
+            f"{guilds['evicted_bytes'] / 1024:.0f} KB reclaimed)"
+        )
+        reloads = self.registry.loads - 1
+        lines.append(
+            f"Startup: cog ready in {self.load_seconds * 1000:.0f} ms"
+            + (f", reloaded {reloads} time(s) without stopping playback" if reloads else "")
+        )
+        lines.append(
+            f"Notifications: {self.notifier.sent} sent, {self.notifier.edited} edited in place, "
+            f"{self.notifier.coalesced} merged or superseded before being shown"
+        )
+        lines.append(
+            f"HTTP: {self.http.requests} requests, response cache {len(self.http.cache)} entries, "
+            f"{self.http.cache.hits} hits / {self.http.cache.misses} misses"
+        )
+        if self.metrics.enabled:
+            latencies = []
+            for label, name, labels in (
+                ("time to first audio", "music_time_to_first_audio_seconds", {}),
+                ("track gap", "music_track_gap_seconds", {}),
+                ("single extraction", "music_extraction_seconds", {"kind": "single"}),
+                ("search", "music_extraction_seconds", {"kind": "search"}),
+                ("playlist first batch", "music_extraction_seconds", {"kind": "playlist"}),
+            ):
+                histogram = self.metrics.histogram(name, **labels)
+                if histogram is not None:
+                    latencies.append(
+                        f"{label} p50 ≤{histogram.quantile(0.5):g}s / p95 ≤{histogram.quantile(0.95):g}s "
+                        f"({histogram.count})"
+                    )
+            lines.append("Latency: " + ("; ".join(latencies) or "no samples yet"))
+        if self.watchdog:
+            watchdog = self.watchdog
+            lines.append(
+                f"Event loop: {watchdog.stalls} stall(s) over {LOOP_LAG_THRESHOLD * 1000:.0f} ms, "
+                f"worst {watchdog.max_lag:.2f}s" + (f", last {watchdog.last_stall}" if watchdog.last_stall else "")
+            )
+        queued = [len(state.queue) for state in self.guilds if state.queue]
+        lines.append(
+            f"FFmpeg processes: {self._ffmpeg_processes()} playing, "
+            f"{self.audio_cache.fetching if self.audio_cache else 0} caching; "
+            f"{sum(queued)} tracks queued across {len(queued)} guild(s), max {max(queued, default=0)}"
+        )
+        buffered = {guild_id: self._buffered_bytes(guild_id) for guild_id in set(self.prebuffers) | set(self.sources)}
+        starts = sum(self.prebuffer_stats.values())
+        lines.append(
+            f"Prebuffer ({PREBUFFER_SECONDS:g}s): {self.prebuffer_stats['ready']}/{starts} track starts "
+            f"played from a ready buffer, {self.prebuffer_stats['warming']} still warming up; "
+            f"{sum(buffered.values()) / 1024:.0f} KB held, max {max(buffered.values(), default=0) / 1024:.0f} KB per guild"
+        )
+        if USE_MIXER:
+            lines.append(
+                f"Mixer: normalization {'on' if NORMALIZE_LOUDNESS else 'off'}, crossfade {CROSSFADE_SECONDS:g}s, "
+                f"{len(self.track_gains)} track gains cached ({self.track_gains.hits} reused)"
+            )
+        if self.audio_cache:
+            cache = self.audio_cache
+            lines.append(
+                f"Audio cache: {len(cache)} files, {cache.size / 1e6:.0f}/{cache.max_bytes / 1e6:.0f} MB, "
+                f"hit ratio {cache.hit_ratio * 100:.0f}% ({cache.hits}/{cache.hits + cache.misses}), "
+                f"{cache.bytes_saved / 1e6:.0f} MB not re-streamed, {cache.evictions} evicted"
+            )
+        await ctx.send("\n".join(lines))
+
+    @commands.command(extras=READ_ONLY)
+    @commands.is_owner()
+    async def profile(self, ctx: commands.Context, seconds: float = 10):
+        """Sample what every thread is doing for a while and save it to disk (owner only)."""
+        if self.profiling:
+            return await ctx.send("A profile is already running.")
+        seconds = min(max(seconds, 1), MAX_PROFILE_SECONDS)
+        self.profiling = True
+        try:
+            await ctx.send(f"Profiling for {seconds:g}s...")
+            # The loop thread is this one; label it so it stands out from the worker threads
+            names = {threading.get_ident(): "event-loop"}
+            counts, rounds = await asyncio.to_thread(sample_stacks, seconds, PROFILE_INTERVAL, names)
+            path = os.path.join(PROFILE_DIR, time.strftime("profile-%Y%m%d-%H%M%S.folded"))
+            await asyncio.to_thread(write_folded, path, counts)
+        finally:
+            self.profiling = False
+
+        lines = [f"Took {rounds} samples of every thread, saved to `{path}` (folded stacks, for flamegraph.pl or speedscope)."]
+        top = top_frames(counts, "event-loop")
+        if top:
+            lines.append("Event loop spent the most samples in:")
+            lines.extend(f"  {count / rounds * 100:.0f}% {frame}" for frame, count in top)
+        await ctx.send("\n".join(lines))
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
@@ -532,11 +1673,18 @@ class Music(commands.Cog):
         if vc is None:
             return
 
+        await self._ensure_restored(member.guild.id)
+
         # Check if the bot is the only one left in the channel
         if len(vc.channel.members) == 1:
+            self._cancel_ingestion(member.guild.id)
             self._get_queue(member.guild.id).clear()
-            self.now_playing[member.guild.id] = None
-            vc.stop()
+            self._cancel_prefetch(member.guild.id)
+            self._cancel_validation(member.guild.id)
+            self.notifier.forget(member.guild.id)
+            self._state(member.guild.id).now_playing = None
+            self._mark_dirty(member.guild.id)
+            self._stop_playback(member.guild)
             await vc.disconnect()
 
 
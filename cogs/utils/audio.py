@@ -0,0 +1,267 @@
+import importlib.util
+import math
+import threading
+from collections import deque
+from typing import Callable
+
+import discord
+
+# NumPy takes a while to import, so it's only loaded once a MixerSource is needed
+# (or load_numpy is called ahead of time). Without it normalization and crossfade are disabled.
+MIXER_AVAILABLE = importlib.util.find_spec("numpy") is not None
+np = None
+_RAMP = None
+
+# Loudness tracks are normalized to, as the RMS of int16 samples (about -20 dBFS)
+TARGET_RMS = 3277.0
+# Frames quieter than this (about -50 dBFS) don't count towards a track's loudness
+GATE_RMS = 104.0
+# Gain is never pushed beyond these bounds, so near-silent intros aren't blown up
+MIN_GAIN, MAX_GAIN = 0.25, 4.0
+# Non-silent frames measured before a track's gain is fixed (250 frames = 5 s)
+ANALYSIS_FRAMES = 250
+# Max gain change per 20 ms frame while the estimate settles (about x2 per 0.7 s)
+GAIN_STEP = 1.02
+
+
+class PrebufferedSource(discord.AudioSource):
+    """Reads another source ahead of time into a bounded in-memory frame buffer.
+
+    A background thread starts pulling frames (and with them, spawning FFmpeg and
+    connecting to the stream) as soon as this is created. Once the buffer holds
+    ``max_frames`` the thread waits, so memory stays bounded. The voice player then
+    reads from the buffer, so the first frame is available immediately.
+    """
+
+    def __init__(self, source: discord.AudioSource, max_frames: int):
+        self.source = source
+        self.max_frames = max(1, max_frames)
+        self.buffered_bytes = 0
+        self._frames: deque[bytes] = deque()
+        self._cond = threading.Condition()
+        self._done = False    # the wrapped source ran out
+        self._closed = False  # cleanup() was called
+        self._thread = threading.Thread(target=self._fill, name="prebuffer", daemon=True)
+        self._thread.start()
+
+    @property
+    def ready(self) -> bool:
+        """Whether the first frame is already waiting."""
+        return bool(self._frames) or self._done
+
+    def _fill(self):
+        while True:
+            with self._cond:
+                while len(self._frames) >= self.max_frames and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+            # Read outside the lock; this blocks on FFmpeg's pipe
+            try:
+                frame = self.source.read()
+            except Exception:
+                frame = b""
+            with self._cond:
+                if not frame:
+                    self._done = True
+                    self._cond.notify_all()
+                    return
+                self._frames.append(frame)
+                self.buffered_bytes += len(frame)
+                self._cond.notify_all()
+
+    def read(self) -> bytes:
+        with self._cond:
+            while not self._frames and not self._done and not self._closed:
+                self._cond.wait()
+            if not self._frames:
+                return b""
+            frame = self._frames.popleft()
+            self.buffered_bytes -= len(frame)
+            self._cond.notify_all()
+            return frame
+
+    def is_opus(self) -> bool:
+        return self.source.is_opus()
+
+    def cleanup(self):
+        with self._cond:
+            self._closed = True
+            self._frames.clear()
+            self.buffered_bytes = 0
+            self._cond.notify_all()
+        self.source.cleanup()
+
+
+def load_numpy():
+    """Import NumPy for the mixer; safe to call from any thread, any number of times."""
+    global np, _RAMP
+    if np is not None:
+        return
+    import numpy
+
+    # Position of every sample within a 20 ms frame, shaped to broadcast over both channels
+    _RAMP = (numpy.arange(discord.opus.Encoder.SAMPLES_PER_FRAME, dtype=numpy.float32)
+             / discord.opus.Encoder.SAMPLES_PER_FRAME)[:, None]
+    np = numpy
+
+
+def _ramp(start: float, end: float):
+    """Per-sample factor going from ``start`` to ``end`` over one frame (a scalar if flat)."""
+    if start == end:
+        return start
+    return start + (end - start) * _RAMP
+
+
+class _Channel:
+    """One track feeding a MixerSource, with its loudness measurement and gain."""
+
+    __slots__ = ("source", "gain", "target", "on_gain", "measuring", "_energy", "_measured")
+
+    def __init__(self, source: discord.AudioSource, gain: float | None,
+                 on_gain: Callable[[float], None] | None):
+        self.source = source
+        self.gain = self.target = gain or 1.0
+        self.on_gain = on_gain
+        self.measuring = gain is None  # a known gain is reused as is
+        self._energy = 0.0
+        self._measured = 0
+
+    @property
+    def ready(self) -> bool:
+        return getattr(self.source, "ready", True)
+
+    def read(self):
+        """Next frame as float samples with this track's gain applied, or None at the end."""
+        frame = self.source.read()
+        if not frame:
+            return None
+        samples = np.frombuffer(frame, dtype=np.int16).reshape(-1, 2).astype(np.float32)
+        if self.measuring:
+            energy = float(np.dot(samples.ravel(), samples.ravel())) / samples.size
+            if energy > GATE_RMS * GATE_RMS:
+                self._energy += energy
+                self._measured += 1
+                rms = math.sqrt(self._energy / self._measured)
+                self.target = min(max(TARGET_RMS / rms, MIN_GAIN), MAX_GAIN)
+                if self._measured == 1:
+                    self.gain = self.target  # nothing audible played yet, so no need to ramp
+                if self._measured >= ANALYSIS_FRAMES:
+                    self.measuring = False
+                    if self.on_gain:
+                        self.on_gain(self.target)
+        start = self.gain
+        self.gain = min(max(self.target, start / GAIN_STEP), start * GAIN_STEP)
+        samples *= _ramp(start, self.gain)
+        return samples
+
+
+class MixerSource(discord.AudioSource):
+    """PCM stage that normalizes loudness per track and can crossfade into the next one.
+
+    Each track's gain is measured over its first few seconds of non-silent audio and
+    then fixed; ``on_gain`` is called once with it so the caller can cache it, and a
+    known ``gain`` skips the measurement entirely. All processing is done with NumPy
+    on whole 20 ms frames. ``volume`` can be changed while playing, like
+    ``PCMVolumeTransformer``; changes are ramped over one frame so they don't click.
+    """
+
+    def __init__(self, source: discord.AudioSource, volume: float = 1.0, gain: float | None = None,
+                 on_gain: Callable[[float], None] | None = None, normalize: bool = True):
+        if not MIXER_AVAILABLE:
+            raise RuntimeError("MixerSource requires NumPy")
+        load_numpy()
+        self.volume = volume
+        self.normalize = normalize
+        self._volume = volume  # what the last frame ended at
+        self._current: _Channel | None = self._channel(source, gain, on_gain)
+        self._incoming: _Channel | None = None
+        self._fade_frames = 0
+        self._fade_pos = 0
+        self._lock = threading.Lock()
+
+    def _channel(self, source, gain, on_gain) -> _Channel:
+        if not self.normalize:
+            gain, on_gain = 1.0, None
+        return _Channel(source, gain, on_gain)
+
+    @property
+    def buffered_bytes(self) -> int:
+        """Memory held in pre-buffers by the tracks being mixed."""
+        channels = (self._current, self._incoming)
+        return sum(getattr(c.source, "buffered_bytes", 0) for c in channels if c is not None)
+
+    def crossfade_to(self, source: discord.AudioSource, frames: int, gain: float | None = None,
+                     on_gain: Callable[[float], None] | None = None):
+        """Fade from the current track into ``source`` over ``frames`` 20 ms frames.
+
+        The fade starts once ``source`` has audio ready (see PrebufferedSource.ready);
+        until then the current track keeps playing alone. If the current track ends
+        first, ``source`` simply takes over.
+        """
+        channel = self._channel(source, gain, on_gain)
+        with self._lock:
+            replaced, self._incoming = self._incoming, channel
+            self._fade_frames = max(1, frames)
+            self._fade_pos = 0
+        if replaced is not None:
+            replaced.source.cleanup()
+
+    def _promote(self):
+        """Make the incoming track the current one."""
+        with self._lock:
+            old, self._current, self._incoming = self._current, self._incoming, None
+        if old is not None:
+            old.source.cleanup()
+
+    def _drop_incoming(self):
+        with self._lock:
+            dropped, self._incoming = self._incoming, None
+        if dropped is not None:
+            dropped.source.cleanup()
+
+    def read(self) -> bytes:
+        with self._lock:
+            current, incoming = self._current, self._incoming
+        if current is None:
+            return b""
+        samples = current.read()
+
+        if incoming is not None and samples is None:
+            # The outgoing track ran out before (or during) the fade
+            self._promote()
+            return self.read()
+        if samples is None:
+            return b""
+        if incoming is not None and (self._fade_pos or incoming.ready):
+            fresh = incoming.read()
+            if fresh is None:
+                self._drop_incoming()  # failed to start; the current track carries on
+            else:
+                # Equal-power weights, so the overall level doesn't dip mid-fade;
+                # taken at the frame edges and interpolated linearly in between
+                step = math.pi / 2 / self._fade_frames
+                t0, t1 = self._fade_pos * step, (self._fade_pos + 1) * step
+                samples *= _ramp(math.cos(t0), math.cos(t1))
+                fresh *= _ramp(math.sin(t0), math.sin(t1))
+                samples += fresh
+                self._fade_pos += 1
+                if self._fade_pos >= self._fade_frames:
+                    self._promote()
+
+        volume = self.volume
+        samples *= _ramp(self._volume, volume)
+        self._volume = volume
+        np.clip(samples, -32768, 32767, out=samples)
+        return samples.astype(np.int16).tobytes()
+
+    def is_opus(self) -> bool:
+        return False
+
+    def cleanup(self):
+        with self._lock:
+            channels = (self._current, self._incoming)
+            self._current = self._incoming = None
+        for channel in channels:
+            if channel is not None:
+                channel.source.cleanup()
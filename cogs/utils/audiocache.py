@@ -0,0 +1,153 @@
+import asyncio
+import hashlib
+import os
+from collections import OrderedDict
+
+FFMPEG_RECONNECT_OPTS = ["-reconnect", "1", "-reconnect_streamed", "1", "-reconnect_delay_max", "5"]
+# Tracks longer than this (or live streams) are never cached
+MAX_TRACK_SECONDS = 15 * 60
+# How many play counts to remember for tracks that aren't cached yet
+PLAY_COUNT_LIMIT = 10_000
+
+
+class AudioCache:
+    """Size-bounded LRU cache of track audio, stored as Opus files on disk.
+
+    A track is fetched in the background once it has been played ``min_plays`` times,
+    so only tracks that actually get replayed (across guilds, or by loop modes) take
+    up space. Files are named by a hash of the track key, so the index can be rebuilt
+    from the directory on startup; least recently used files are evicted once the
+    directory goes over ``max_bytes``.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, min_plays: int = 2, max_fetches: int = 2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.min_plays = min_plays
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+        self.fetching = 0  # FFmpeg processes running right now
+        self._files: OrderedDict[str, int] = OrderedDict()  # file name -> size, oldest first
+        self._bytes = 0
+        self._plays: OrderedDict[str, int] = OrderedDict()
+        self._fetches: dict[str, asyncio.Task] = {}
+        self._fetch_slots = asyncio.Semaphore(max_fetches)
+
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith(".part"):
+                os.remove(path)  # interrupted fetch
+            elif name.endswith(".opus"):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._files[name] = size
+            self._bytes += size
+        self._evict()
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @staticmethod
+    def _name(key: str) -> str:
+        return hashlib.sha1(key.encode()).hexdigest() + ".opus"
+
+    def lookup(self, key: str) -> str | None:
+        """Path of the cached audio for a track, or None if it isn't cached."""
+        name = self._name(key)
+        size = self._files.get(name)
+        if size is None:
+            self.misses += 1
+            return None
+        self._files.move_to_end(name)
+        self.hits += 1
+        self.bytes_saved += size
+        return os.path.join(self.directory, name)
+
+    def record_play(self, key: str, url: str, duration: float, codec: str | None):
+        """Count a play and start caching the track once it has earned it."""
+        name = self._name(key)
+        if name in self._files or name in self._fetches:
+            return
+        if not duration or duration > MAX_TRACK_SECONDS:
+            return
+
+        plays = self._plays.pop(name, 0) + 1
+        if plays < self.min_plays:
+            self._plays[name] = plays
+            if len(self._plays) > PLAY_COUNT_LIMIT:
+                self._plays.popitem(last=False)
+            return
+
+        task = asyncio.create_task(self._fetch(name, url, codec))
+        self._fetches[name] = task
+        task.add_done_callback(lambda t: self._fetches.pop(name, None))
+
+    async def _fetch(self, name: str, url: str, codec: str | None):
+        path = os.path.join(self.directory, name)
+        partial = path + ".part"
+        # Opus sources are remuxed as-is; anything else is encoded once here
+        codec_args = ["-c:a", "copy"] if codec == "opus" else ["-c:a", "libopus", "-b:a", "128k"]
+
+        async with self._fetch_slots:
+            proc = await asyncio.create_subprocess_exec(
+                "ffmpeg", *FFMPEG_RECONNECT_OPTS, "-i", url, "-vn", "-map_metadata", "-1",
+                *codec_args, "-f", "opus", "-loglevel", "error", "-y", partial,
+                stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            self.fetching += 1
+            try:
+                _, stderr = await proc.communicate()
+            except asyncio.CancelledError:
+                proc.kill()
+                await proc.wait()
+                self._discard(partial)
+                raise
+            finally:
+                self.fetching -= 1
+
+        if proc.returncode != 0:
+            self._discard(partial)
+            print(f"Audio cache fetch failed: {stderr.decode(errors='replace').strip()[:200]}")
+            return
+
+        os.replace(partial, path)
+        size = os.path.getsize(path)
+        self._files[name] = size
+        self._bytes += size
+        self._evict()
+
+    @staticmethod
+    def _discard(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._files:
+            name, size = self._files.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            # Anything still playing this file keeps its open handle
+            self._discard(os.path.join(self.directory, name))
+
+    async def close(self):
+        for task in list(self._fetches.values()):
+            task.cancel()
+        if self._fetches:
+            await asyncio.gather(*self._fetches.values(), return_exceptions=True)
@@ -0,0 +1,152 @@
+import re
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Stream URLs without an expiry hint are trusted for this long
+STREAM_TTL_FALLBACK = 30 * 60
+# Re-resolve a little before the CDN's own deadline so FFmpeg never gets a dead URL
+STREAM_EXPIRY_MARGIN = 5 * 60
+# Titles and durations don't change, so they can outlive the stream URL by a lot
+METADATA_TTL = 24 * 60 * 60
+
+# googlevideo uses ?expire=<unix> (or /expire/<unix>/ in manifest paths), CloudFront uses Expires=
+EXPIRY_REGEX = re.compile(r"[?&/](?:expire|Expires)[=/](\d+)")
+
+TRACKING_PARAMS = {"si", "feature", "pp", "ab_channel"}
+YOUTUBE_HOSTS = {"youtube.com", "m.youtube.com", "music.youtube.com", "www.youtube.com"}
+
+
+def stream_expiry(url: str, now: float) -> float:
+    """Return the unix time after which a direct stream URL should be re-resolved."""
+    match = EXPIRY_REGEX.search(url)
+    if match:
+        return int(match.group(1)) - STREAM_EXPIRY_MARGIN
+    return now + STREAM_TTL_FALLBACK
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a URL or search term so equivalent lookups share one cache key."""
+    query = query.strip()
+    if not query.startswith(("http://", "https://")):
+        return " ".join(query.casefold().split())
+
+    parts = urlsplit(query)
+    host = parts.netloc.lower()
+    path = parts.path.rstrip("/")
+    params = [
+        (k, v) for k, v in parse_qsl(parts.query)
+        if k not in TRACKING_PARAMS and not k.startswith("utm_")
+    ]
+
+    # youtu.be/<id> and the mobile/music hosts all point at the same watch page
+    if host == "youtu.be" and path:
+        host, params, path = "www.youtube.com", [("v", path[1:])] + params, "/watch"
+    elif host in YOUTUBE_HOSTS:
+        host = "www.youtube.com"
+
+    return urlunsplit(("https", host, path, urlencode(params), ""))
+
+
+class _Entry:
+    __slots__ = ("info", "stream_expires", "metadata_expires")
+
+    def __init__(self, info: dict, stream_expires: float, metadata_expires: float):
+        self.info = info
+        self.stream_expires = stream_expires
+        self.metadata_expires = metadata_expires
+
+
+class ExtractionCache:
+    """LRU cache of yt-dlp results shared by every guild.
+
+    Each entry is stored under both the query that produced it and its ``webpage_url``.
+    Metadata stays valid for ``metadata_ttl``; the direct stream URL only until its
+    own expiry, after which the entry is *stale* and the caller should re-resolve
+    the ``webpage_url`` (which skips any search step).
+    """
+
+    def __init__(self, maxsize: int = 2048, metadata_ttl: float = METADATA_TTL):
+        self.maxsize = maxsize
+        self.metadata_ttl = metadata_ttl
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, query: str) -> tuple[dict | None, bool]:
+        """Look up a query. Returns ``(info, fresh)``; ``info`` is None on a miss."""
+        key = normalize_query(query)
+        entry = self._entries.get(key)
+        now = time.time()
+
+        if entry is None or entry.metadata_expires <= now:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None, False
+
+        self._entries.move_to_end(key)
+        if entry.stream_expires <= now:
+            self.stale += 1
+            return dict(entry.info), False
+
+        self.hits += 1
+        return dict(entry.info), True
+
+    def put(self, query: str, info: dict):
+        now = time.time()
+        entry = _Entry(dict(info), stream_expiry(info["url"], now), now + self.metadata_ttl)
+
+        keys = {normalize_query(query)}
+        if info.get("webpage_url"):
+            keys.add(normalize_query(info["webpage_url"]))
+        for key in keys:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+class TTLCache:
+    """Small LRU cache whose entries also expire after a per-entry TTL."""
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[object, tuple[float, object]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, value, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
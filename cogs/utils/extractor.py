@@ -0,0 +1,284 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+# Job priorities, lowest value runs first
+INTERACTIVE = 0   # a user is waiting on this (!play, the track that's about to start)
+BACKGROUND = 1    # prefetching, playlist enumeration
+VALIDATE = 2      # checking queued entries long before they play
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background", VALIDATE: "validate"}
+
+
+def _youtube_dl(options: dict):
+    # Imported on first use, on a worker thread: yt-dlp is one of the slowest imports at startup
+    import yt_dlp
+
+    return yt_dlp.YoutubeDL(options)
+
+
+# Failures yt-dlp marks as expected that are really about us, not the video
+_THROTTLED = ("not a bot", "too many requests", "rate-limit", "rate limit", "429", "try again later")
+
+
+def is_unavailable(error: BaseException) -> bool:
+    """Whether a failed lookup is about the video itself (removed, private, blocked) and will fail again.
+
+    yt-dlp marks those errors as "expected"; timeouts, network errors and HTTP 429
+    throttling aren't, and may well work on the next try.
+    """
+    # extract_info wraps the extractor's error in a DownloadError
+    exc_info = getattr(error, "exc_info", None)
+    cause = exc_info[1] if exc_info and exc_info[1] is not None else error
+    if not getattr(cause, "expected", False):
+        return False
+    message = str(cause).lower()
+    return not any(marker in message for marker in _THROTTLED)
+
+
+class _Job:
+    __slots__ = ("fn", "options", "future", "submitted", "key")
+
+    def __init__(self, fn: Callable, options: dict, future: asyncio.Future, key: str | None = None):
+        self.fn = fn
+        self.options = options
+        self.future = future
+        self.submitted = time.monotonic()
+        self.key = key  # what was looked up, so a queued job can be found again (see promote)
+
+
+class ExtractionScheduler:
+    """A bounded pool of yt-dlp workers shared by every guild.
+
+    Interactive jobs always run before background ones. Within a priority, guilds
+    take turns, so one guild with a huge backlog can't starve the rest. Each worker
+    thread keeps its own ``YoutubeDL`` per options dict instead of building one per call.
+
+    Priority only decides which job starts next; a running job keeps its worker.
+    Jobs that would hold one for a long time (playlist enumeration) therefore go
+    through ``submit_long`` to a small pool of their own, a step at a time.
+    """
+
+    def __init__(self, workers: int = 16, ytdl_factory: Callable[[dict], Any] = _youtube_dl,
+                 long_workers: int = 2):
+        self.workers = workers
+        self.long_workers = long_workers
+        self._ytdl_factory = ytdl_factory
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ytdl")
+        self._long_pool = ThreadPoolExecutor(max_workers=long_workers, thread_name_prefix="ytdl-long")
+        self._local = threading.local()
+        # priority -> guild_id -> pending jobs; dict order is the round-robin order
+        self._pending: dict[int, OrderedDict[int, deque[_Job]]] = {p: OrderedDict() for p in PRIORITY_NAMES}
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+        self.busy = 0
+        self.completed = 0
+        self.long_jobs = 0  # submitted to the long-job pool and not finished, running or not
+        self._long_free = long_workers
+        # guild_id -> steps waiting for a long-job thread; dict order is the round-robin order
+        self._long_waiting: OrderedDict[int, deque[asyncio.Future]] = OrderedDict()
+        self._waits: dict[int, deque[float]] = {p: deque(maxlen=500) for p in PRIORITY_NAMES}
+
+    def start(self):
+        """Start the worker tasks. Must be called from the running event loop."""
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def warm_up(self, options: dict):
+        """Import yt-dlp and load its extractors in the background, before anyone is waiting on them."""
+        asyncio.create_task(self.submit(lambda ytdl: None, options, priority=BACKGROUND))
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        for jobs_by_guild in self._pending.values():
+            for jobs in jobs_by_guild.values():
+                for job in jobs:
+                    job.future.cancel()
+            jobs_by_guild.clear()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._long_pool.shutdown(wait=False, cancel_futures=True)
+
+    # ── submission ───────────────────────────────────────────
+
+    async def submit(self, fn: Callable[[Any], Any], options: dict, guild_id: int | None = None,
+                     priority: int = INTERACTIVE, key: str | None = None) -> Any:
+        """Run ``fn(ytdl)`` on a worker thread, where ``ytdl`` is built from ``options``.
+
+        Cancelling the awaiting task drops the job if it hasn't started yet.
+        """
+        future = asyncio.get_running_loop().create_future()
+        jobs_by_guild = self._pending[priority]
+        jobs_by_guild.setdefault(guild_id or 0, deque()).append(_Job(fn, options, future, key))
+        self._wakeup.set()
+        return await future
+
+    def promote(self, key: str, priority: int = INTERACTIVE) -> bool:
+        """Move queued jobs for ``key`` up to ``priority``, e.g. a prefetch whose track is starting now.
+
+        Returns whether any were found; jobs that already started are left alone.
+        """
+        found = False
+        for lower in PRIORITY_NAMES:
+            if lower <= priority:
+                continue
+            jobs_by_guild = self._pending[lower]
+            for guild_id in list(jobs_by_guild):
+                jobs = jobs_by_guild[guild_id]
+                moving = [job for job in jobs if job.key == key]
+                if not moving:
+                    continue
+                for job in moving:
+                    jobs.remove(job)
+                if not jobs:
+                    del jobs_by_guild[guild_id]
+                self._pending[priority].setdefault(guild_id, deque()).extend(moving)
+                found = True
+        return found
+
+    async def submit_long(self, step: Callable[[Any], bool], options: dict, guild_id: int | None = None):
+        """Run ``step(ytdl)`` on the long-job pool over and over until it returns False.
+
+        Each call should do a bounded piece of work, such as one batch of a playlist.
+        Between calls guilds take turns for the pool's threads, so a few huge playlists
+        slow every other load down instead of blocking it until they're done. The job
+        gets a ``YoutubeDL`` of its own, since its calls may run on different threads.
+        """
+        loop = asyncio.get_running_loop()
+        ytdl = None
+
+        def run() -> bool:
+            nonlocal ytdl
+            if ytdl is None:
+                ytdl = self._ytdl_factory(options)
+            return step(ytdl)
+
+        self.long_jobs += 1
+        try:
+            while True:
+                await self._long_turn(guild_id or 0)
+                try:
+                    more = await loop.run_in_executor(self._long_pool, run)
+                finally:
+                    self._long_done()
+                if not more:
+                    return
+        finally:
+            self.long_jobs -= 1
+
+    async def _long_turn(self, guild_id: int):
+        """Wait for a long-job thread; guilds that are waiting get one in turn."""
+        if self._long_free and not self._long_waiting:
+            self._long_free -= 1
+            return
+        turn = asyncio.get_running_loop().create_future()
+        self._long_waiting.setdefault(guild_id, deque()).append(turn)
+        try:
+            await turn
+        except asyncio.CancelledError:
+            if turn.done() and not turn.cancelled():
+                self._long_done()  # handed a thread just as we were cancelled; pass it on
+            else:
+                waiting = self._long_waiting.get(guild_id)
+                if waiting is not None and turn in waiting:
+                    waiting.remove(turn)
+                    if not waiting:
+                        del self._long_waiting[guild_id]
+            raise
+
+    def _long_done(self):
+        """Hand a finished step's thread to the next guild in line."""
+        while self._long_waiting:
+            guild_id, waiting = next(iter(self._long_waiting.items()))
+            turn = waiting.popleft()
+            if waiting:
+                self._long_waiting.move_to_end(guild_id)
+            else:
+                del self._long_waiting[guild_id]
+            if not turn.done():
+                turn.set_result(None)
+                return
+        self._long_free += 1
+
+    async def extract(self, query: str, options: dict, guild_id: int | None = None,
+                      priority: int = INTERACTIVE, key: str | None = None) -> dict:
+        """``ytdl.extract_info(query)``; ``key`` (default ``query``) is what ``promote`` finds it by."""
+        return await self.submit(
+            lambda ytdl: ytdl.extract_info(query, download=False), options, guild_id, priority, key or query
+        )
+
+    # ── workers ──────────────────────────────────────────────
+
+    def _next_job(self) -> _Job | None:
+        for priority, jobs_by_guild in self._pending.items():
+            while jobs_by_guild:
+                guild_id, jobs = next(iter(jobs_by_guild.items()))
+                job = jobs.popleft()
+                if jobs:
+                    # Send this guild to the back of the line
+                    jobs_by_guild.move_to_end(guild_id)
+                else:
+                    del jobs_by_guild[guild_id]
+                if not job.future.cancelled():
+                    self._waits[priority].append(time.monotonic() - job.submitted)
+                    return job
+        return None
+
+    def _ytdl(self, options: dict):
+        """Return this worker thread's ``YoutubeDL`` for an options dict."""
+        instances = getattr(self._local, "instances", None)
+        if instances is None:
+            instances = self._local.instances = {}
+        ytdl = instances.get(id(options))
+        if ytdl is None:
+            ytdl = instances[id(options)] = self._ytdl_factory(options)
+        return ytdl
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = self._next_job()
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            self.busy += 1
+            try:
+                result = await loop.run_in_executor(self._pool, lambda: job.fn(self._ytdl(job.options)))
+            except asyncio.CancelledError:
+                job.future.cancel()
+                raise
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                if not job.future.done():
+                    job.future.set_result(result)
+            finally:
+                self.busy -= 1
+                self.completed += 1
+
+    # ── visibility ───────────────────────────────────────────
+
+    def queue_depth(self, priority: int | None = None) -> int:
+        priorities = PRIORITY_NAMES if priority is None else (priority,)
+        return sum(len(jobs) for p in priorities for jobs in self._pending[p].values())
+
+    def stats(self) -> dict:
+        """Queue depth and wait times (seconds, over recent jobs) per priority."""
+        result = {"workers": self.workers, "busy": self.busy, "completed": self.completed,
+                  "long_workers": self.long_workers, "long_jobs": self.long_jobs}
+        for priority, name in PRIORITY_NAMES.items():
+            waits = self._waits[priority]
+            result[name] = {
+                "queued": self.queue_depth(priority),
+                "guilds": len(self._pending[priority]),
+                "avg_wait": sum(waits) / len(waits) if waits else 0.0,
+                "max_wait": max(waits, default=0.0),
+            }
+        return result
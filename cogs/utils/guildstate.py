@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+from typing import Callable, Iterator
+
+import discord
+
+from cogs.utils.track import Track, TrackQueue
+
+# Opus mode only passes Opus sources through untouched (no FFmpeg re-encode) at 100%
+DEFAULT_VOLUME = 1.0 if os.getenv("PLAYBACK_MODE", "pcm").lower() == "opus" else 0.5
+
+
+def _entry_bytes(key: str, info: dict) -> int:
+    return sys.getsizeof(key) + sys.getsizeof(info) + sum(map(sys.getsizeof, info.values()))
+
+
+class GuildState:
+    """Everything the music cog remembers about one guild between commands.
+
+    Short-lived work (prefetch tasks, buffers, timers) stays in the cog and is torn
+    down when playback stops; this is what's left afterwards, and what idle
+    eviction reclaims.
+    """
+
+    __slots__ = ("guild_id", "queue", "now_playing", "volume", "loop_mode", "text_channel",
+                 "play_started", "paused_at", "validated", "validated_bytes", "last_active", "saved")
+
+    def __init__(self, guild_id: int):
+        self.guild_id = guild_id
+        self.queue = TrackQueue()
+        self.now_playing: Track | None = None
+        self.volume = DEFAULT_VOLUME                   # 0.0–1.0
+        self.loop_mode = "off"                         # "off" | "track" | "queue"
+        self.text_channel: discord.abc.Messageable | None = None  # where notifications go
+        self.play_started: float | None = None         # monotonic time the current track was at 0:00
+        self.paused_at: float | None = None            # monotonic time playback was paused
+        self.validated: dict[str, dict] = {}           # key of a queued entry known to play -> its lookup
+        self.validated_bytes = 0                       # memory held by ``validated``'s entries
+        self.last_active = time.monotonic()
+        self.saved: tuple | None = None                # fingerprint() of what was last snapshotted
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
+    def mark_valid(self, key: str, info: dict):
+        """Remember what checking a queued entry found. Use this rather than writing to ``validated``."""
+        old = self.validated.get(key)
+        if old is not None:
+            self.validated_bytes -= _entry_bytes(key, old)
+        self.validated[key] = info
+        self.validated_bytes += _entry_bytes(key, info)
+
+    def forget_valid(self, keep: set[str] | None = None):
+        """Drop checked entries, or only those whose key isn't in ``keep``."""
+        if keep is None:
+            self.validated.clear()
+            self.validated_bytes = 0
+            return
+        for key in [key for key in self.validated if key not in keep]:
+            self.validated_bytes -= _entry_bytes(key, self.validated.pop(key))
+
+    def is_default(self) -> bool:
+        return (not self.queue and self.now_playing is None
+                and self.volume == DEFAULT_VOLUME and self.loop_mode == "off")
+
+    def fingerprint(self) -> tuple:
+        """Changes whenever something ``to_dict`` saves changes, without walking the queue."""
+        channel_id = self.text_channel.id if self.text_channel else None
+        return self.queue.version, self.now_playing, self.volume, self.loop_mode, channel_id
+
+    def to_dict(self) -> dict | None:
+        """State worth keeping across restarts, or None if the guild is back to defaults.
+
+        The queue is a list of the Track objects themselves, which is quick to take on
+        the event loop; the store turns them into rows (``Track.to_row``) on its own thread.
+        """
+        if self.is_default():
+            return None
+        # The current track can't be resumed mid-way after a restart, so it goes back on the queue
+        tracks = [self.now_playing] if self.now_playing else []
+        tracks.extend(self.queue)
+        return {
+            "queue": tracks,
+            "volume": None if self.volume == DEFAULT_VOLUME else self.volume,  # follows the mode's default
+            "loop_mode": self.loop_mode,
+            "text_channel_id": self.text_channel.id if self.text_channel else None,
+        }
+
+    def load(self, state: dict, get_channel: Callable[[int], discord.abc.Messageable | None]):
+        """Apply a snapshot from ``to_dict``. Anything already changed since startup wins."""
+        if not self.queue and self.now_playing is None:
+            self.queue.extend(Track.from_row(row) for row in state["queue"])
+        if self.volume == DEFAULT_VOLUME and state["volume"] is not None:
+            self.volume = state["volume"]
+        if self.loop_mode == "off":
+            self.loop_mode = state["loop_mode"]
+        if self.text_channel is None and state["text_channel_id"]:
+            self.text_channel = get_channel(state["text_channel_id"])
+
+    def approx_bytes(self) -> int:
+        """Rough memory held by this guild's state."""
+        size = sys.getsizeof(self) + self.queue.approx_bytes()
+        if self.now_playing is not None:
+            size += self.now_playing.approx_bytes()
+        return size + sys.getsizeof(self.validated) + self.validated_bytes
+
+
+class GuildStates:
+    """The live GuildState of every guild, plus counters for the ones evicted while idle."""
+
+    def __init__(self):
+        self._states: dict[int, GuildState] = {}
+        self.evicted = 0        # guilds dropped from memory since startup
+        self.spilled = 0        # ... of which were saved to disk first
+        self.evicted_bytes = 0  # memory they were holding
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, guild_id: int) -> bool:
+        return guild_id in self._states
+
+    def __iter__(self) -> Iterator[GuildState]:
+        return iter(list(self._states.values()))
+
+    def get(self, guild_id: int) -> GuildState:
+        """A guild's state, created with defaults if it isn't in memory."""
+        state = self._states.get(guild_id)
+        if state is None:
+            state = self._states[guild_id] = GuildState(guild_id)
+        return state
+
+    def peek(self, guild_id: int) -> GuildState | None:
+        return self._states.get(guild_id)
+
+    def idle(self, max_idle: float) -> list[int]:
+        """Guilds with no activity in the last ``max_idle`` seconds."""
+        cutoff = time.monotonic() - max_idle
+        return [guild_id for guild_id, state in self._states.items() if state.last_active < cutoff]
+
+    def evict(self, guild_id: int, spilled: bool = False):
+        state = self._states.pop(guild_id, None)
+        if state is None:
+            return
+        self.evicted += 1
+        self.spilled += spilled
+        self.evicted_bytes += state.approx_bytes()
+
+    def report(self) -> dict:
+        """Live vs evicted guilds and the memory involved, in bytes."""
+        return {
+            "live": len(self._states),
+            "live_bytes": sum(state.approx_bytes() for state in self._states.values()),
+            "evicted": self.evicted,
+            "spilled": self.spilled,
+            "evicted_bytes": self.evicted_bytes,
+        }
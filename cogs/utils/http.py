@@ -0,0 +1,88 @@
+import asyncio
+
+import aiohttp
+
+from cogs.utils.cache import TTLCache
+
+
+class HTTPClient:
+    """The cog's single pooled HTTP session, with a response cache for JSON lookups.
+
+    Connections (and TLS sessions) are reused across requests. Successful responses
+    are cached for ``ttl`` seconds and "not found" answers for ``negative_ttl``, and
+    identical requests that are already in flight share one round trip.
+    """
+
+    def __init__(self, *, timeout: float = 10, limit: int = 32, cache_size: int = 2048,
+                 ttl: float = 6 * 60 * 60, negative_ttl: float = 10 * 60):
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.limit = limit
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache = TTLCache(cache_size)
+        self.requests = 0
+        self._session: aiohttp.ClientSession | None = None
+        self._inflight: dict[tuple[str, str], list] = {}  # key -> [task, waiters]
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def get_json(self, url: str, *, ttl: float | None = None) -> tuple[int, dict | None]:
+        """GET a JSON document. Returns ``(status, data)``; ``data`` is None unless status is 200."""
+        return await self._get(url, "json", ttl)
+
+    async def get_text(self, url: str, *, ttl: float | None = None) -> tuple[int, str | None]:
+        """GET a text document, cached the same way as ``get_json``. ``ttl=0`` skips caching the body."""
+        return await self._get(url, "text", ttl)
+
+    async def _get(self, url: str, kind: str, ttl: float | None) -> tuple[int, object]:
+        key = (kind, url)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        # The fetch runs as its own task so one caller giving up doesn't cancel it for
+        # everyone else waiting on the same URL; it's only cancelled once nobody waits.
+        entry = self._inflight.get(key)
+        if entry is None:
+            task = asyncio.create_task(self._fetch_and_cache(key, url, kind, ttl))
+            entry = self._inflight[key] = [task, 0]
+        task = entry[0]
+        entry[1] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                if self._inflight.get(key) is entry:
+                    del self._inflight[key]
+                task.cancel()  # no-op once it has finished
+
+    async def _fetch_and_cache(self, key: tuple[str, str], url: str, kind: str,
+                               ttl: float | None) -> tuple[int, object]:
+        result = await self._fetch(url, kind)
+        status = result[0]
+        ttl = self.ttl if ttl is None else ttl
+        if status == 200 and ttl > 0:
+            self.cache.put(key, result, ttl)
+        elif status == 404:
+            self.cache.put(key, result, self.negative_ttl)
+        return result
+
+    async def _fetch(self, url: str, kind: str) -> tuple[int, object]:
+        self.requests += 1
+        async with self.session.get(url) as resp:
+            if resp.status != 200:
+                return resp.status, None
+            if kind == "json":
+                return resp.status, await resp.json(content_type=None)
+            return resp.status, await resp.text()
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+import discord
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# A collector returns (metric name, labels, value) for every gauge sample it has right now
+Collector = Callable[[], Iterable[tuple[str, dict, float]]]
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the ``q`` quantile (inf if it's past the last one)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in sorted(labels.items())) + "}"
+
+
+class Metrics:
+    """Latency histograms and on-demand gauges for the music cog.
+
+    When disabled, ``observe`` returns straight away and ``probe_first_frame``
+    leaves the source alone, so instrumented code paths cost an attribute check.
+    Gauges are only computed by the collectors when something reads them.
+    """
+
+    def __init__(self, enabled: bool, descriptions: dict[str, str] | None = None):
+        self.enabled = enabled
+        self.descriptions = descriptions or {}
+        self._histograms: dict[str, dict[tuple, Histogram]] = {}
+        self._collectors: list[Collector] = []
+        self._runner = None
+        self._dump_task: asyncio.Task | None = None
+
+    def observe(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        by_labels = self._histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        histogram = by_labels.get(key)
+        if histogram is None:
+            histogram = by_labels[key] = Histogram()
+        histogram.observe(value)
+
+    def histogram(self, name: str, **labels) -> Histogram | None:
+        return self._histograms.get(name, {}).get(tuple(sorted(labels.items())))
+
+    def add_collector(self, collector: Collector):
+        self._collectors.append(collector)
+
+    def probe_first_frame(self, source: discord.AudioSource, callback: Callable[[], None]):
+        """Call ``callback`` (on the voice thread) once ``source`` hands out its first frame.
+
+        The probe shadows ``source.read`` on the instance and removes itself after
+        the first call, so later frames go straight to the real method.
+        """
+        if not self.enabled:
+            return
+        read = source.read
+
+        def first_read():
+            frame = read()
+            del source.read
+            if frame:
+                callback()
+            return frame
+
+        source.read = first_read
+
+    # ── export ───────────────────────────────────────────────
+
+    def _gauges(self) -> dict[str, list[tuple[dict, float]]]:
+        gauges: dict[str, list[tuple[dict, float]]] = {}
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                gauges.setdefault(name, []).append((labels, value))
+        return gauges
+
+    def render(self) -> str:
+        """Everything in the Prometheus text exposition format."""
+        lines = []
+        for name, by_labels in sorted(self._histograms.items()):
+            if name in self.descriptions:
+                lines.append(f"# HELP {name} {self.descriptions[name]}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, histogram in by_labels.items():
+                labels = dict(key)
+                cumulative = 0
+                for bound, count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                    lines.append(f"{name}_bucket{_labels({**labels, 'le': le})} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {histogram.sum:.6f}")
+                lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+        for name, samples in sorted(self._gauges().items()):
+            if name in self.descriptions:
+                lines.append(f"# HELP {name} {self.descriptions[name]}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                lines.append(f"{name}{_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> dict:
+        """Everything as plain JSON-able data."""
+        return {
+            "time": time.time(),
+            "histograms": {
+                name: [
+                    {"labels": dict(key), "buckets": list(h.buckets), "counts": h.counts, "sum": h.sum, "count": h.count}
+                    for key, h in by_labels.items()
+                ]
+                for name, by_labels in self._histograms.items()
+            },
+            "gauges": {
+                name: [{"labels": labels, "value": value} for labels, value in samples]
+                for name, samples in self._gauges().items()
+            },
+        }
+
+    async def serve(self, host: str, port: int):
+        """Expose ``render()`` at ``http://host:port/metrics``."""
+        # Only needed when the endpoint is on, so it stays out of startup otherwise
+        from aiohttp import web
+
+        async def handle(request: web.Request) -> web.Response:
+            return web.Response(text=self.render(), content_type="text/plain", charset="utf-8")
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+    def dump_every(self, path: str, interval: float):
+        """Rewrite ``path`` with ``to_dict()`` every ``interval`` seconds."""
+        self._dump_task = asyncio.create_task(self._dump_loop(path, interval))
+
+    async def _dump_loop(self, path: str, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self._write, path, json.dumps(self.to_dict(), separators=(",", ":")))
+            except Exception as e:
+                print(f"Failed to write metrics: {e}")
+
+    @staticmethod
+    def _write(path: str, data: str):
+        partial = path + ".tmp"
+        with open(partial, "w") as f:
+            f.write(data)
+        os.replace(partial, path)
+
+    async def close(self):
+        if self._dump_task is not None:
+            self._dump_task.cancel()
+            self._dump_task = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,157 @@
+import asyncio
+import time
+from collections import deque
+
+import discord
+
+
+def describe_skipped(skipped: list[tuple[str, str]], verb: str, where: str = "", limit: int = 5) -> str:
+    """One message for a run of unplayable tracks given as ``(title, reason)``, naming the first few."""
+    if len(skipped) == 1:
+        title, reason = skipped[0]
+        return f"{verb} **{title}**{where} ({reason})."
+    names = ", ".join(f"**{title}** ({reason})" for title, reason in skipped[:limit])
+    if len(skipped) > limit:
+        names += f" and {len(skipped) - limit} more"
+    return f"{verb} {len(skipped)} unplayable tracks{where}: {names}."
+
+
+class _Feed:
+    """Pending notifications for one guild."""
+
+    __slots__ = ("channel", "notices", "skipped", "now_playing", "message", "task", "tokens", "refilled")
+
+    def __init__(self, burst: int):
+        self.channel: discord.abc.Messageable | None = None
+        self.notices: deque[str] = deque()
+        self.skipped: list[tuple[str, str]] = []
+        self.now_playing: str | None = None     # latest now-playing text not shown yet
+        self.message: discord.Message | None = None  # now-playing message to edit in place
+        self.task: asyncio.Task | None = None
+        self.tokens = float(burst)
+        self.refilled = time.monotonic()
+
+    def pending(self) -> bool:
+        return bool(self.notices or self.skipped or self.now_playing is not None)
+
+
+class Notifier:
+    """Posts playback notifications per guild without holding up playback.
+
+    Callers only record what happened; a per-guild task sends it. Consecutive
+    "Skipping" notices are merged into one message, a newer now-playing text
+    replaces one that hasn't been shown yet, and the now-playing message is
+    edited in place while it's still the last message in the channel. Each guild
+    gets ``rate`` requests per ``per`` seconds (Discord's per-channel message
+    bucket), and anything that arrives while it waits is coalesced.
+    """
+
+    def __init__(self, rate: int = 5, per: float = 5.0):
+        self.rate = rate
+        self.per = per
+        self._feeds: dict[int, _Feed] = {}
+        self.sent = 0
+        self.edited = 0
+        self.coalesced = 0  # notices merged into another message or replaced before being shown
+
+    def _feed(self, guild_id: int, channel: discord.abc.Messageable) -> _Feed:
+        feed = self._feeds.get(guild_id)
+        if feed is None:
+            feed = self._feeds[guild_id] = _Feed(self.rate)
+        feed.channel = channel
+        return feed
+
+    def _wake(self, feed: _Feed):
+        if feed.task is None:
+            feed.task = asyncio.create_task(self._run(feed))
+
+    # ── recording ────────────────────────────────────────────
+
+    def notice(self, guild_id: int, channel: discord.abc.Messageable | None, content: str):
+        """Queue a one-off message."""
+        if channel is None:
+            return
+        feed = self._feed(guild_id, channel)
+        feed.notices.append(content)
+        self._wake(feed)
+
+    def skipped(self, guild_id: int, channel: discord.abc.Messageable | None, skipped: list[tuple[str, str]]):
+        """Record tracks skipped at play time, as ``(title, reason)``."""
+        if channel is None or not skipped:
+            return
+        feed = self._feed(guild_id, channel)
+        if feed.skipped:
+            self.coalesced += 1
+        feed.skipped.extend(skipped)
+        self._wake(feed)
+
+    def now_playing(self, guild_id: int, channel: discord.abc.Messageable | None, content: str):
+        """Show ``content`` as the guild's now-playing message."""
+        if channel is None:
+            return
+        feed = self._feed(guild_id, channel)
+        if feed.now_playing is not None:
+            self.coalesced += 1
+        feed.now_playing = content
+        self._wake(feed)
+
+    def track_message(self, guild_id: int, message: discord.Message):
+        """Use a now-playing message sent elsewhere (e.g. a command reply) as the one to edit next."""
+        self._feed(guild_id, message.channel).message = message
+
+    def forget(self, guild_id: int):
+        """Drop anything pending for a guild, e.g. after it stopped playing."""
+        feed = self._feeds.pop(guild_id, None)
+        if feed is not None and feed.task is not None:
+            feed.task.cancel()
+
+    def close(self):
+        for guild_id in list(self._feeds):
+            self.forget(guild_id)
+
+    # ── sending ──────────────────────────────────────────────
+
+    async def _acquire(self, feed: _Feed):
+        """Wait for a slot in the guild's rate-limit bucket."""
+        while True:
+            now = time.monotonic()
+            feed.tokens = min(self.rate, feed.tokens + (now - feed.refilled) * self.rate / self.per)
+            feed.refilled = now
+            if feed.tokens >= 1:
+                feed.tokens -= 1
+                return
+            await asyncio.sleep((1 - feed.tokens) * self.per / self.rate)
+
+    async def _run(self, feed: _Feed):
+        try:
+            while feed.pending():
+                await self._acquire(feed)
+                # Read state only now: whatever arrived while we waited goes out together
+                try:
+                    if feed.notices:
+                        await feed.channel.send(feed.notices.popleft())
+                        self.sent += 1
+                    elif feed.skipped:
+                        skipped, feed.skipped = feed.skipped, []
+                        await feed.channel.send(describe_skipped(skipped, "Skipping"))
+                        self.sent += 1
+                    else:
+                        content, feed.now_playing = feed.now_playing, None
+                        await self._show_now_playing(feed, content)
+                except discord.HTTPException as e:
+                    print(f"Failed to send notification: {e}")
+        finally:
+            feed.task = None
+
+    async def _show_now_playing(self, feed: _Feed, content: str):
+        message = feed.message
+        # Editing only makes sense while nobody has to scroll up to see it
+        if message is not None and getattr(feed.channel, "last_message_id", None) == message.id:
+            try:
+                await message.edit(content=content)
+                self.edited += 1
+                return
+            except discord.NotFound:
+                pass
+        feed.message = await feed.channel.send(content)
+        self.sent += 1
@@ -0,0 +1,153 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections import Counter
+from typing import Callable
+
+# Frames kept in the stack sample of a stall, innermost first
+STACK_DEPTH = 12
+
+
+def _describe_task(task: asyncio.Task | None, labels: weakref.WeakKeyDictionary) -> str:
+    if task is None:
+        return "a loop callback"
+    label = labels.get(task)
+    if label:
+        return label
+    coro = task.get_coro()
+    return f"task {task.get_name()} ({getattr(coro, '__qualname__', coro)})"
+
+
+class LoopWatchdog:
+    """Measures event-loop lag and says what was running when the loop stalls.
+
+    A task on the loop wakes every ``interval`` seconds and records how late it
+    was. A helper thread watches that heartbeat; once the loop has been stuck for
+    longer than ``threshold`` it samples the loop thread's stack and the task that
+    was running, so the report names the culprit rather than whoever ran next.
+    Tasks can be given readable names with ``tag`` (e.g. the command they serve).
+    """
+
+    def __init__(self, threshold: float, interval: float = 0.1, on_lag: Callable[[float], None] | None = None):
+        self.threshold = threshold
+        self.interval = interval
+        self.on_lag = on_lag  # called on the loop with every lag measurement
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.last_stall: str | None = None
+        self._labels: weakref.WeakKeyDictionary[asyncio.Task, str] = weakref.WeakKeyDictionary()
+        self._beat = time.monotonic()
+        self._sample: tuple[str, str] | None = None  # (what was running, stack) for the current stall
+        self._stop = threading.Event()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def loop_thread(self) -> int | None:
+        return self._loop_thread
+
+    def tag(self, task: asyncio.Task | None, label: str):
+        """Name ``task`` in stall reports."""
+        if task is not None:
+            self._labels[task] = label
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._tick())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._thread = None
+
+    async def _tick(self):
+        while True:
+            before = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = now = time.monotonic()
+            lag = max(now - before - self.interval, 0.0)
+            sample, self._sample = self._sample, None
+            if self.on_lag is not None:
+                self.on_lag(lag)
+            if lag < self.threshold:
+                continue
+            self.stalls += 1
+            self.max_lag = max(self.max_lag, lag)
+            culprit, stack = sample or ("unknown (too short to sample)", "")
+            self.last_stall = f"{lag:.2f}s in {culprit}"
+            print(f"Event loop blocked for {lag:.2f}s, running {culprit}")
+            if stack:
+                print(stack, end="")
+
+    def _watch(self):
+        poll = min(self.threshold / 4, 0.05)
+        while not self._stop.wait(poll):
+            if self._sample is not None or time.monotonic() - self._beat < self.interval + self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            # current_task only reads the loop's entry in a dict, so it's fine from here
+            culprit = _describe_task(asyncio.current_task(self._loop), self._labels)
+            self._sample = (culprit, "".join(traceback.format_stack(frame, limit=STACK_DEPTH)))
+
+
+def sample_stacks(duration: float, interval: float = 0.005,
+                  names: dict[int, str] | None = None) -> tuple[Counter[str], int]:
+    """Sample every thread's stack for ``duration`` seconds.
+
+    Returns the samples in folded form (``thread;outer;...;inner`` -> count, the
+    input format of flamegraph.pl and speedscope) and the number of rounds taken.
+    ``names`` overrides thread names, e.g. to label the event loop thread.
+    """
+    me = threading.get_ident()
+    counts: Counter[str] = Counter()
+    rounds = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        threads = {thread.ident: thread.name for thread in threading.enumerate()}
+        if names:
+            threads.update(names)
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(threads.get(ident, str(ident)))
+            counts[";".join(reversed(stack))] += 1
+        rounds += 1
+        time.sleep(interval)
+    return counts, rounds
+
+
+def top_frames(counts: Counter[str], thread: str, limit: int = 5) -> list[tuple[str, int]]:
+    """Functions ``thread`` spent the most samples in (innermost frame only)."""
+    own: Counter[str] = Counter()
+    for stack, count in counts.items():
+        frames = stack.split(";")
+        if frames[0] == thread and len(frames) > 1:
+            own[frames[-1]] += count
+    return own.most_common(limit)
+
+
+def write_folded(path: str, counts: Counter[str]):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        for stack, count in counts.most_common():
+            f.write(f"{stack} {count}\n")
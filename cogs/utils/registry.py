@@ -0,0 +1,57 @@
+import asyncio
+import time
+from typing import Any, Callable, TypeVar
+
+from discord.ext import commands
+
+T = TypeVar("T")
+
+RELOAD_ATTEMPTS = 5
+
+
+async def reload_extension(bot: commands.Bot, name: str):
+    """``bot.reload_extension``, tried again if another thread imported a module at the wrong moment.
+
+    discord.py walks sys.modules before it unloads anything, and yt-dlp imports its
+    extractors on first use, on the extraction threads; if one lands mid-walk the
+    reload fails with nothing changed yet.
+    """
+    for attempt in range(RELOAD_ATTEMPTS):
+        try:
+            return await bot.reload_extension(name)
+        except RuntimeError as e:
+            if "changed size during iteration" not in str(e) or attempt == RELOAD_ATTEMPTS - 1:
+                raise
+            await asyncio.sleep(0.01)
+
+
+class Registry:
+    """State that outlives one instance of a cog, kept on the bot.
+
+    ``reload_extension`` throws the cog's module away and builds a new cog, but the
+    bot (and every ``cogs.utils`` module) stays. A cog that gets what should survive
+    (queues, what's playing) from here instead of creating it in ``__init__`` picks
+    up right where the previous instance left off.
+    """
+
+    def __init__(self):
+        self._objects: dict[str, Any] = {}
+        self.created = time.perf_counter()
+        self.loads = 0                          # cog instances that used this registry
+        self.unloaded_at: float | None = None   # perf_counter() when the last instance was unloaded
+        self.cog: commands.Cog | None = None    # the instance loaded now, None between unload and load
+
+    @classmethod
+    def of(cls, bot: commands.Bot, name: str) -> "Registry":
+        """The registry called ``name`` on ``bot``, created on first use."""
+        registries = bot.__dict__.setdefault("_registries", {})
+        registry = registries.get(name)
+        if registry is None:
+            registry = registries[name] = cls()
+        return registry
+
+    def get(self, key: str, factory: Callable[[], T]) -> T:
+        """The object kept under ``key``, made with ``factory`` if there isn't one yet."""
+        if key not in self._objects:
+            self._objects[key] = factory()
+        return self._objects[key]
@@ -0,0 +1,132 @@
+import asyncio
+import re
+import time
+from collections import deque
+from typing import Callable
+
+from cogs.utils.extractor import INTERACTIVE, ExtractionScheduler
+
+# Queries that already name a site or a search backend are never hedged
+EXPLICIT_QUERY_REGEX = re.compile(r"^(?:[a-z][a-z0-9+.-]*://|[a-z]+search\d*:)", re.IGNORECASE)
+
+# Hedge delay used until the primary source has enough latency samples
+DEFAULT_HEDGE_DELAY = 2.0
+MIN_HEDGE_DELAY, MAX_HEDGE_DELAY = 0.3, 5.0
+# Samples needed before the hedge delay follows the primary source's p95
+MIN_SAMPLES = 20
+
+
+class SearchError(Exception):
+    """No source returned a playable result."""
+
+
+def is_plain_query(query: str) -> bool:
+    """Whether a query is free text (not a URL and not already prefixed with a search backend)."""
+    return not EXPLICIT_QUERY_REGEX.match(query.strip())
+
+
+class SourceStats:
+    """Latency samples (seconds, time spent in yt-dlp) and outcomes for one search source."""
+
+    def __init__(self, samples: int = 200):
+        # Appended from worker threads, so it also covers losers whose result was discarded
+        self.latencies: deque[float] = deque(maxlen=samples)
+        self.started = 0
+        self.wins = 0
+        self.failures = 0
+        self.rejected = 0  # answered, but with nothing playable (e.g. only Go+ previews)
+
+    def percentile(self, p: float) -> float | None:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+class HedgedSearch:
+    """Runs a free-text search against several backends and keeps the first playable answer.
+
+    ``sources`` are yt-dlp search prefixes in order of preference (e.g. ``ytsearch``).
+    In ``"parallel"`` mode every source is queried at once. In ``"hedged"`` mode the
+    first source is queried alone, and the next one only joins if no playable answer
+    came back within the hedge delay, which follows the first source's recent p95
+    latency. Whatever is still running once an answer is accepted is cancelled.
+    """
+
+    def __init__(self, extractor: ExtractionScheduler, options: dict, sources: list[str],
+                 mode: str = "hedged", accept: Callable[[dict], bool] = lambda entry: True):
+        self.extractor = extractor
+        self.options = options
+        self.sources = sources
+        self.mode = mode
+        self.accept = accept
+        self.stats = {source: SourceStats() for source in sources}
+        self.searches = 0
+        self.hedges = 0  # searches where a second source had to be asked
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait on the primary source before asking the next one."""
+        stats = self.stats[self.sources[0]]
+        if len(stats.latencies) < MIN_SAMPLES:
+            return DEFAULT_HEDGE_DELAY
+        return min(max(stats.percentile(0.95), MIN_HEDGE_DELAY), MAX_HEDGE_DELAY)
+
+    async def _query(self, source: str, query: str, guild_id: int | None, priority: int) -> dict:
+        stats = self.stats[source]
+        stats.started += 1
+
+        def run(ytdl):
+            start = time.monotonic()
+            try:
+                return ytdl.extract_info(f"{source}:{query}", download=False)
+            finally:
+                stats.latencies.append(time.monotonic() - start)
+
+        try:
+            data = await self.extractor.submit(run, self.options, guild_id, priority)
+        except Exception:
+            stats.failures += 1
+            raise
+        for entry in data.get("entries") or [data]:
+            if entry and entry.get("url") and self.accept(entry):
+                return entry
+        stats.rejected += 1
+        raise SearchError(f"No playable result on {source}.")
+
+    async def search(self, query: str, guild_id: int | None = None, priority: int = INTERACTIVE) -> dict:
+        """Return the yt-dlp info of the first playable result."""
+        self.searches += 1
+        delay = 0 if self.mode == "parallel" else self.hedge_delay()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        running: dict[asyncio.Task, int] = {}  # task -> index of its source
+        launched = 0
+        error: Exception | None = None
+        try:
+            while True:
+                # Launch every source that is due; if nothing is left running, don't wait for the timer
+                while launched < len(self.sources) and (
+                    not running or loop.time() - started >= delay * launched
+                ):
+                    if launched == 1 and self.mode != "parallel":
+                        self.hedges += 1
+                    task = asyncio.create_task(self._query(self.sources[launched], query, guild_id, priority))
+                    running[task] = launched
+                    launched += 1
+                if not running:
+                    raise error or SearchError("No results found.")
+
+                timeout = None
+                if launched < len(self.sources):
+                    timeout = max(started + delay * launched - loop.time(), 0)
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                # Prefer the earlier source when several answer at once
+                for task in sorted(done, key=running.get):
+                    source = self.sources[running.pop(task)]
+                    if task.exception() is None:
+                        self.stats[source].wins += 1
+                        return task.result()
+                    error = task.exception()
+        finally:
+            for task in running:
+                task.cancel()
@@ -0,0 +1,68 @@
+import random
+from collections import defaultdict
+from typing import Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+def artist_of(title: str) -> str:
+    # Most YouTube/SoundCloud titles use "Artist - Title" format
+    if " - " in title:
+        return title.split(" - ", 1)[0].strip().lower()
+    return title.strip().lower()
+
+
+def smart_shuffle(tracks: Sequence[T]) -> list[T]:
+    """Shuffle tracks while spacing out tracks from the same artist/uploader.
+
+    Each artist's tracks get evenly spaced ideal positions and take the first free slot
+    at or after it (wrapping around). Free slots are found through a union-find
+    "next free" index, so the whole shuffle is O(n log n) instead of the O(n²) of
+    scanning forward slot by slot.
+    """
+    total = len(tracks)
+    if total < 2:
+        return list(tracks)
+
+    # Group tracks by artist
+    groups: dict[str, list[T]] = defaultdict(list)
+    for track in tracks:
+        groups[artist_of(track.title)].append(track)
+
+    # Shuffle within each artist group for randomness
+    for group in groups.values():
+        random.shuffle(group)
+
+    # Sort groups largest-first so the most common artists get placed first
+    # (they need the most precise spacing)
+    sorted_groups = sorted(groups.values(), key=len, reverse=True)
+
+    result: list[T | None] = [None] * total
+    # next_free[i] points towards the first free slot >= i; index `total` wraps to 0
+    next_free = list(range(total + 1))
+
+    def find(pos: int) -> int:
+        root = pos
+        while next_free[root] != root:
+            root = next_free[root]
+        # Path compression
+        while next_free[pos] != root:
+            next_free[pos], pos = root, next_free[pos]
+        return root
+
+    for group in sorted_groups:
+        count = len(group)
+        spacing = total / count
+        # Random offset within the first interval so the pattern isn't predictable
+        offset = random.random() * spacing
+
+        for i, track in enumerate(group):
+            ideal = int(round(offset + i * spacing)) % total
+            pos = find(ideal)
+            if pos == total:
+                pos = find(0)
+            result[pos] = track
+            # Taken: anything looking here continues from the next slot
+            next_free[pos] = pos + 1
+
+    return result
@@ -0,0 +1,76 @@
+import json
+import re
+from urllib.parse import quote
+
+from cogs.utils.http import HTTPClient
+
+SPOTIFY_REGEX = re.compile(
+    r"https?://open\.spotify\.com/(?:intl-[a-z]{2}/)?(track|album|playlist)/([a-zA-Z0-9]+)"
+)
+NEXT_DATA_REGEX = re.compile(r'<script id="__NEXT_DATA__" type="application/json">(.*?)</script>', re.S)
+
+
+class SpotifyError(Exception):
+    pass
+
+
+class SpotifyResolver:
+    """Turns Spotify links into yt-dlp search queries, without API credentials.
+
+    Tracks go through the oEmbed endpoint. Albums and playlists are read from the
+    public embed page, which lists up to 100 tracks. Point ``base_url`` at a fake
+    server (or swap in another object with the same ``resolve``) to test without Spotify.
+    """
+
+    def __init__(self, http: HTTPClient, base_url: str = "https://open.spotify.com", search_prefix: str = "ytsearch:"):
+        self.http = http
+        self.base_url = base_url.rstrip("/")
+        self.search_prefix = search_prefix
+
+    async def resolve(self, url: str) -> list[str]:
+        """Return one search query per track, in order."""
+        match = SPOTIFY_REGEX.match(url)
+        if not match:
+            return [url]
+
+        kind, spotify_id = match.groups()
+        if kind == "track":
+            return [await self._track_query(spotify_id)]
+        return await self._collection_queries(kind, spotify_id)
+
+    async def _track_query(self, track_id: str) -> str:
+        # Keyed on the track ID so share-link variants (?si=...) hit the same cache entry
+        track_url = f"https://open.spotify.com/track/{track_id}"
+        status, data = await self.http.get_json(f"{self.base_url}/oembed?url={quote(track_url, safe='')}")
+        if status != 200:
+            raise SpotifyError("Could not fetch Spotify track info.")
+        # oEmbed title is "track name - artist"
+        return f"{self.search_prefix}{data['title']}"
+
+    async def _collection_queries(self, kind: str, spotify_id: str) -> list[str]:
+        # The embed page is hundreds of KB; cache only the queries parsed out of it
+        key = ("spotify", kind, spotify_id)
+        queries = self.http.cache.get(key)
+        if queries is not None:
+            return queries
+
+        status, html = await self.http.get_text(f"{self.base_url}/embed/{kind}/{spotify_id}", ttl=0)
+        if status != 200:
+            raise SpotifyError(f"Could not fetch Spotify {kind} info.")
+
+        match = NEXT_DATA_REGEX.search(html)
+        try:
+            entity = json.loads(match.group(1))["props"]["pageProps"]["state"]["data"]["entity"]
+            items = entity["trackList"]
+        except (AttributeError, KeyError, TypeError, ValueError):
+            raise SpotifyError(f"Could not read the Spotify {kind} track list.") from None
+
+        queries = []
+        for item in items:
+            title = item.get("title")
+            if not title:
+                continue
+            artist = (item.get("subtitle") or "").replace("\u00a0", " ")
+            queries.append(f"{self.search_prefix}{artist} - {title}" if artist else f"{self.search_prefix}{title}")
+        self.http.cache.put(key, queries, self.http.ttl)
+        return queries
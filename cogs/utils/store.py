@@ -0,0 +1,151 @@
+import asyncio
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS guild_state (
+    guild_id   INTEGER PRIMARY KEY,
+    state      TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+# Returned by the snapshot callback for a guild that hasn't changed since it was last written
+UNCHANGED = object()
+
+
+def _encode(obj: Any) -> Any:
+    """JSON fallback: objects that know their stored form (Track.to_row) are converted here."""
+    to_row = getattr(obj, "to_row", None)
+    if to_row is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return to_row()
+
+
+class GuildStore:
+    """SQLite snapshots of per-guild playback state, written behind in batches.
+
+    Commands only mark a guild dirty; a background task snapshots every dirty guild
+    once per ``flush_interval`` and writes them in a single transaction, so a burst
+    of ``!play`` calls costs one commit. Snapshots that failed to write are kept and
+    written with the next flush, unless the guild has a newer one by then. Nothing is read at startup except the set
+    of stored guild IDs; each guild's state is loaded the first time it's needed.
+
+    All SQLite work runs on one dedicated thread.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 5.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.known: set[int] = set()     # guild IDs with a stored snapshot
+        self.flushes = 0
+        self.rows_written = 0
+        self._dirty: set[int] = set()
+        self._unwritten: dict[int, dict | None] = {}  # snapshots from a flush that failed
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="guild-store")
+        self._conn: sqlite3.Connection | None = None
+        self._snapshot: Callable[[int], dict | None] | None = None
+        self._task: asyncio.Task | None = None
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    # ── lifecycle ────────────────────────────────────────────
+
+    async def open(self, snapshot: Callable[[int], dict | None]):
+        """Open the database and start the write-behind task.
+
+        ``snapshot(guild_id)`` returns the state to store for a guild, None to delete it,
+        or UNCHANGED to leave the stored row alone. It runs on the event loop, so it
+        should be cheap; the state is JSON-encoded on the store thread (see ``_encode``).
+        """
+        self._snapshot = snapshot
+        self.known = await self._run(self._open)
+        self._task = asyncio.create_task(self._flush_loop())
+
+    def _open(self) -> set[int]:
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+        return {row[0] for row in self._conn.execute("SELECT guild_id FROM guild_state")}
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._conn is not None:
+            await self.flush()
+            await self._run(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=True)
+
+    # ── reads ────────────────────────────────────────────────
+
+    async def load(self, guild_id: int) -> dict | None:
+        if guild_id not in self.known:
+            return None
+        return await self._run(self._load, guild_id)
+
+    def _load(self, guild_id: int) -> dict | None:
+        row = self._conn.execute("SELECT state FROM guild_state WHERE guild_id = ?", (guild_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # ── writes ───────────────────────────────────────────────
+
+    def mark_dirty(self, guild_id: int):
+        self._dirty.add(guild_id)
+
+    async def flush(self):
+        """Write every dirty guild now."""
+        if not (self._dirty or self._unwritten) or self._conn is None:
+            return
+        dirty, self._dirty = self._dirty, set()
+        snapshots, self._unwritten = self._unwritten, {}
+        # Snapshots are taken on the loop so they see a consistent state;
+        # encoding and I/O happen on the store thread.
+        for guild_id in dirty:
+            state = self._snapshot(guild_id)
+            if state is not UNCHANGED:
+                snapshots[guild_id] = state
+        if not snapshots:
+            return
+        try:
+            await self._run(self._write, list(snapshots.items()))
+        except Exception:
+            # Try again next time, unless a newer snapshot comes along first
+            self._unwritten = {**snapshots, **self._unwritten}
+            raise
+        for guild_id, state in snapshots.items():
+            if state is None:
+                self.known.discard(guild_id)
+            else:
+                self.known.add(guild_id)
+        self.flushes += 1
+        self.rows_written += len(snapshots)
+
+    def _write(self, snapshots: list[tuple[int, dict | None]]):
+        now = time.time()
+        upserts = [(guild_id, json.dumps(state, separators=(",", ":"), default=_encode), now)
+                   for guild_id, state in snapshots if state is not None]
+        deletes = [(guild_id,) for guild_id, state in snapshots if state is None]
+        with self._conn:
+            if upserts:
+                self._conn.executemany(
+                    "INSERT INTO guild_state (guild_id, state, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(guild_id) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                    upserts,
+                )
+            if deletes:
+                self._conn.executemany("DELETE FROM guild_state WHERE guild_id = ?", deletes)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Failed to save guild state: {e}")
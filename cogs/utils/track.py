@@ -0,0 +1,286 @@
+import sys
+from collections import deque
+from itertools import chain, islice
+from typing import Iterable, Iterator
+
+# Titles longer than this are cut in queue listings so a page always fits in one message
+MAX_TITLE_LENGTH = 80
+
+# Tracks per chunk in a TrackQueue. Small enough that list.insert/pop inside
+# a chunk is a short memmove, big enough that walking the chunks stays cheap.
+CHUNK_SIZE = 512
+
+
+def format_duration(seconds: int | float) -> str:
+    if not seconds:
+        return "Live / Unknown"
+    seconds = int(seconds)
+    m, s = divmod(seconds, 60)
+    h, m = divmod(m, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
+
+
+class Track:
+    """A queued song. Slotted, since big guilds keep tens of thousands of these around."""
+
+    __slots__ = ("title", "url", "webpage_url", "duration", "is_preview", "codec", "_line")
+
+    def __init__(self, title: str, url: str, webpage_url: str = "", duration: float = 0, is_preview: bool = False,
+                 codec: str | None = None):
+        self.title = title
+        self.url = url                        # direct audio stream URL once resolved
+        # Flat entries often have the same URL for both; keep a single string
+        self.webpage_url = url if webpage_url == url else webpage_url
+        self.duration = duration or 0
+        self.is_preview = is_preview
+        self.codec = codec                    # audio codec of the stream URL, e.g. "opus"
+        self._line = None
+
+    @classmethod
+    def from_info(cls, info: dict) -> "Track":
+        return cls(
+            info.get("title") or "Unknown",
+            info["url"],
+            info.get("webpage_url") or info["url"],
+            info.get("duration") or 0,
+            info.get("is_preview", False),
+            info.get("codec"),
+        )
+
+    @classmethod
+    def from_row(cls, row: list) -> "Track":
+        """Rebuild a track saved with ``to_row``. It will be re-resolved before it plays."""
+        title, webpage_url, duration, is_preview = row
+        return cls(title, webpage_url, webpage_url, duration, is_preview)
+
+    def to_row(self) -> list:
+        """Compact JSON-able form for persistence. Stream URLs expire, so only the page URL is kept."""
+        return [self.title, self.key, self.duration, self.is_preview]
+
+    @property
+    def key(self) -> str:
+        """Stable identifier used for prefetching and caching."""
+        return self.webpage_url or self.url
+
+    @property
+    def line(self) -> str:
+        """``Title [m:ss]`` for queue listings, formatted once and cached."""
+        if self._line is None:
+            title = self.title if len(self.title) <= MAX_TITLE_LENGTH else self.title[:MAX_TITLE_LENGTH - 3] + "..."
+            self._line = f"{title} [{format_duration(self.duration)}]"
+        return self._line
+
+    def update(self, info: dict):
+        """Apply a yt-dlp resolution result in place.
+
+        Don't call this on a track that is sitting in a TrackQueue; its duration
+        totals would go stale. Pop it first.
+        """
+        self.title = info.get("title") or self.title
+        self.url = info["url"]
+        self.webpage_url = info.get("webpage_url") or self.webpage_url
+        self.duration = info.get("duration") or self.duration
+        self.is_preview = info.get("is_preview", self.is_preview)
+        self.codec = info.get("codec")
+        self._line = None
+
+    def approx_bytes(self) -> int:
+        """Rough memory held by this track, counting its strings but not the cached ``line``."""
+        size = sys.getsizeof(self) + sys.getsizeof(self.title) + sys.getsizeof(self.url)
+        if self.webpage_url is not self.url:
+            size += sys.getsizeof(self.webpage_url)
+        return size
+
+    def __repr__(self) -> str:
+        return f"<Track {self.title!r}>"
+
+
+class TrackQueue:
+    """A guild's play queue, stored as a deque of small chunks.
+
+    Append and pop from the front are O(1); indexing, removal, insertion and moves
+    cost O(n / CHUNK_SIZE) to find the chunk plus O(CHUNK_SIZE) inside it.
+
+    The total duration is kept per chunk and overall, so queue length in time and
+    "plays in" estimates don't need to re-sum the whole queue; so is the tracks' memory,
+    for the same reason. ``version`` goes up on every change, so callers can tell whether
+    anything happened since they last looked.
+    """
+
+    __slots__ = ("_chunks", "_totals", "_len", "total_duration", "track_bytes", "version")
+
+    def __init__(self, tracks: Iterable[Track] = ()):
+        self._chunks: deque[list[Track]] = deque()
+        self._totals: deque[float] = deque()  # total duration of each chunk
+        self._len = 0
+        self.total_duration = 0.0
+        self.track_bytes = 0  # sum of approx_bytes() over the queued tracks
+        self.version = 0
+        self.extend(tracks)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Track]:
+        return chain.from_iterable(self._chunks)
+
+    def __getitem__(self, index: int | slice) -> Track | list[Track]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if step != 1:
+                return list(self)[index]
+            if start >= stop:
+                return []
+            return list(islice(self.iter_from(start), stop - start))
+        chunk, offset = self._locate(index)
+        return self._chunks[chunk][offset]
+
+    def __repr__(self) -> str:
+        return f"<TrackQueue len={self._len}>"
+
+    def _locate(self, index: int) -> tuple[int, int]:
+        """Map a queue position to (chunk index, offset in chunk)."""
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("queue index out of range")
+
+        # Walk from whichever end is closer
+        if index < self._len // 2:
+            for i, chunk in enumerate(self._chunks):
+                if index < len(chunk):
+                    return i, index
+                index -= len(chunk)
+        else:
+            index = self._len - index
+            for i in range(len(self._chunks) - 1, -1, -1):
+                chunk = self._chunks[i]
+                if index <= len(chunk):
+                    return i, len(chunk) - index
+                index -= len(chunk)
+        raise IndexError("queue index out of range")
+
+    def iter_from(self, start: int) -> Iterator[Track]:
+        """Iterate from a position without walking everything before it."""
+        if start >= self._len:
+            return iter(())
+        chunk, offset = self._locate(start)
+        return chain(
+            islice(self._chunks[chunk], offset, None),
+            chain.from_iterable(islice(self._chunks, chunk + 1, None)),
+        )
+
+    def duration_before(self, index: int) -> float:
+        """Total duration of the tracks ahead of position ``index``."""
+        if index >= self._len:
+            return self.total_duration
+        chunk, offset = self._locate(index)
+        return sum(islice(self._totals, chunk)) + sum(t.duration for t in self._chunks[chunk][:offset])
+
+    def append(self, track: Track):
+        if not self._chunks or len(self._chunks[-1]) >= CHUNK_SIZE:
+            self._chunks.append([])
+            self._totals.append(0.0)
+        self._chunks[-1].append(track)
+        self._totals[-1] += track.duration
+        self.total_duration += track.duration
+        self.track_bytes += track.approx_bytes()
+        self._len += 1
+        self.version += 1
+
+    def extend(self, tracks: Iterable[Track]):
+        for track in tracks:
+            self.append(track)
+
+    def popleft(self) -> Track:
+        if not self._len:
+            raise IndexError("pop from an empty queue")
+        chunk = self._chunks[0]
+        track = chunk.pop(0)
+        self._totals[0] -= track.duration
+        if not chunk:
+            self._chunks.popleft()
+            self._totals.popleft()
+        self._len -= 1
+        self.total_duration -= track.duration
+        self.track_bytes -= track.approx_bytes()
+        self.version += 1
+        return track
+
+    def pop(self, index: int = -1) -> Track:
+        i, offset = self._locate(index)
+        chunk = self._chunks[i]
+        track = chunk.pop(offset)
+        self._totals[i] -= track.duration
+        if not chunk:
+            del self._chunks[i]
+            del self._totals[i]
+        self._len -= 1
+        self.total_duration -= track.duration
+        self.track_bytes -= track.approx_bytes()
+        self.version += 1
+        return track
+
+    def insert(self, index: int, track: Track):
+        if index < 0:
+            index = max(0, index + self._len)
+        if index >= self._len:
+            return self.append(track)
+
+        i, offset = self._locate(index)
+        chunk = self._chunks[i]
+        chunk.insert(offset, track)
+        self._totals[i] += track.duration
+        self._len += 1
+        self.total_duration += track.duration
+        self.track_bytes += track.approx_bytes()
+        self.version += 1
+        # Keep chunks bounded so in-chunk operations stay cheap
+        if len(chunk) >= 2 * CHUNK_SIZE:
+            tail = chunk[CHUNK_SIZE:]
+            del chunk[CHUNK_SIZE:]
+            tail_total = sum(t.duration for t in tail)
+            self._chunks.insert(i + 1, tail)
+            self._totals.insert(i + 1, tail_total)
+            self._totals[i] -= tail_total
+
+    def move(self, src: int, dst: int):
+        """Move the track at ``src`` so it ends up at position ``dst``."""
+        self.insert(dst, self.pop(src))
+
+    def remove_all(self, tracks: Iterable[Track]) -> list[Track]:
+        """Remove these exact track objects wherever they are. Returns the ones that were found."""
+        doomed = {id(track) for track in tracks}
+        if not doomed:
+            return []
+        chunks, totals = deque(), deque()
+        removed = []
+        for chunk, total in zip(self._chunks, self._totals):
+            kept = [track for track in chunk if id(track) not in doomed]
+            if len(kept) != len(chunk):
+                removed.extend(track for track in chunk if id(track) in doomed)
+                self.total_duration -= total
+                total = sum(track.duration for track in kept)
+                self.total_duration += total
+            if kept:
+                chunks.append(kept)
+                totals.append(total)
+        self._chunks, self._totals = chunks, totals
+        self._len -= len(removed)
+        self.track_bytes -= sum(track.approx_bytes() for track in removed)
+        if removed:
+            self.version += 1
+        return removed
+
+    def approx_bytes(self) -> int:
+        """Rough memory held by the queue and every track in it."""
+        size = sys.getsizeof(self._chunks) + sys.getsizeof(self._totals) + self.track_bytes
+        return size + sum(map(sys.getsizeof, self._chunks))
+
+    def clear(self):
+        self._chunks.clear()
+        self._totals.clear()
+        self._len = 0
+        self.total_duration = 0.0
+        self.track_bytes = 0
+        self.version += 1
@@ -0,0 +1,331 @@
+"""Cluster mode: the bot's shards spread over several processes.
+
+``launch`` asks Discord how many shards the bot needs, splits them into
+contiguous ranges, one per worker process, and supervises the workers: they are
+started one at a time (each waits for the previous one to finish connecting, to
+stay within Discord's identify limit) and restarted with a backoff if they
+die. Each worker runs an ordinary bot (see bot.create_bot) for its shards.
+
+Workers talk to the launcher over a pipe. A worker can broadcast a request to
+every worker (for the owner commands in cogs/cluster.py); the launcher only
+routes messages and never looks inside them.
+"""
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import urllib.request
+from multiprocessing.connection import Connection, wait
+from typing import Any, Awaitable, Callable
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GATEWAY_URL = "https://discord.com/api/v10/gateway/bot"
+# A worker that hasn't reported ready by then no longer holds up the next one
+READY_TIMEOUT = 120
+# A worker that stayed up this long had its restart backoff reset
+STABLE_SECONDS = 60
+MAX_BACKOFF = 60
+# How long a broadcast waits for the other workers to answer
+BROADCAST_TIMEOUT = 5.0
+
+
+def cluster_processes() -> int:
+    """Worker processes from CLUSTER_PROCESSES: 0 (single process, the default), a number, or "auto"."""
+    setting = os.getenv("CLUSTER_PROCESSES", "0").strip().lower()
+    if setting == "auto":
+        return os.cpu_count() or 1
+    return int(setting)
+
+
+def recommended_shards(token: str) -> int:
+    """Shard count Discord recommends for the bot."""
+    request = urllib.request.Request(GATEWAY_URL, headers={
+        "Authorization": f"Bot {token}",
+        "User-Agent": "DiscordBot (https://github.com/crombieman/Chill-Bot, 1.0)",
+    })
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.load(response)["shards"]
+
+
+def shard_ranges(shard_count: int, processes: int) -> list[list[int]]:
+    """Split shards 0..shard_count-1 into ``processes`` contiguous ranges of near-equal size."""
+    size, extra = divmod(shard_count, processes)
+    ranges, start = [], 0
+    for i in range(processes):
+        end = start + size + (i < extra)
+        ranges.append(list(range(start, end)))
+        start = end
+    return ranges
+
+
+def _worker_env(index: int, processes: int):
+    """Keep per-process files and ports from colliding between workers."""
+    if os.getenv("AUDIO_CACHE_DIR"):
+        os.environ["AUDIO_CACHE_DIR"] = os.path.join(os.environ["AUDIO_CACHE_DIR"], f"worker-{index}")
+        max_mb = int(os.getenv("AUDIO_CACHE_MAX_MB", "2048"))
+        os.environ["AUDIO_CACHE_MAX_MB"] = str(max(max_mb // processes, 1))
+    if int(os.getenv("METRICS_PORT", "0")):
+        os.environ["METRICS_PORT"] = str(int(os.environ["METRICS_PORT"]) + index)
+    if os.getenv("METRICS_FILE"):
+        root, ext = os.path.splitext(os.environ["METRICS_FILE"])
+        os.environ["METRICS_FILE"] = f"{root}-{index}{ext}"
+
+
+def worker_main(index: int, processes: int, shard_ids: list[int], shard_count: int, conn: Connection):
+    """Entry point of a worker process."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C is the launcher's to handle
+    _worker_env(index, processes)
+    from bot import EXTENSIONS, create_bot, run
+
+    bot = create_bot(shard_ids, shard_count)
+    bot.ipc = ClusterClient(conn, index, shard_ids)
+    asyncio.run(run(bot, EXTENSIONS + ("cogs.cluster",)))
+
+
+class ClusterClient:
+    """A worker's end of the pipe to the launcher.
+
+    A thread waits on the pipe and hands messages to the event loop. Requests
+    from other workers go to the handler registered for their ``op``, and its
+    return value is sent back as the reply.
+    """
+
+    def __init__(self, conn: Connection, index: int, shard_ids: list[int]):
+        self.conn = conn
+        self.index = index
+        self.shard_ids = shard_ids
+        self.handlers: dict[str, Callable[[dict], Awaitable[Any]]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pending: dict[int, dict] = {}
+        self._ids = itertools.count()
+        self._send_lock = threading.Lock()
+        self._on_lost: Callable[[], Any] | None = None
+
+    def start(self, on_lost: Callable[[], Any]):
+        """Start listening; ``on_lost`` is called on the loop if the launcher goes away.
+
+        Calling it again (e.g. when cogs.cluster is reloaded) only swaps the callback.
+        """
+        started = self._loop is not None
+        self._loop = asyncio.get_running_loop()
+        self._on_lost = on_lost
+        if not started:
+            threading.Thread(target=self._listen, name="cluster-ipc", daemon=True).start()
+
+    def handle(self, op: str, handler: Callable[[dict], Awaitable[Any]]):
+        self.handlers[op] = handler
+
+    def send(self, message: dict):
+        try:
+            with self._send_lock:
+                self.conn.send(message)
+        except OSError:
+            pass  # launcher is gone; _listen notices too
+
+    async def broadcast(self, request: dict, timeout: float = BROADCAST_TIMEOUT) -> list[dict]:
+        """Send ``request`` to every worker (this one included) and collect the replies that arrive in time."""
+        request_id = next(self._ids)
+        pending = self._pending[request_id] = {
+            "expected": None, "replies": [], "done": self._loop.create_future(),
+        }
+        self.send({"op": "broadcast", "id": request_id, "request": request})
+        try:
+            await asyncio.wait_for(pending["done"], timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            del self._pending[request_id]
+        return pending["replies"]
+
+    def _listen(self):
+        while True:
+            try:
+                message = self.conn.recv()
+            except (EOFError, OSError):
+                self._loop.call_soon_threadsafe(self._on_lost)
+                return
+            self._loop.call_soon_threadsafe(self._dispatch, message)
+
+    def _dispatch(self, message: dict):
+        op = message["op"]
+        if op == "request":
+            asyncio.create_task(self._answer(message))
+            return
+        pending = self._pending.get(message["id"])
+        if pending is None:
+            return  # timed out already
+        if op == "expect":
+            pending["expected"] = message["count"]
+        elif op == "reply":
+            pending["replies"].append(message["data"])
+        if pending["expected"] is not None and len(pending["replies"]) >= pending["expected"]:
+            if not pending["done"].done():
+                pending["done"].set_result(None)
+
+    async def _answer(self, message: dict):
+        request = message["request"]
+        handler = self.handlers.get(request["op"])
+        try:
+            data = await handler(request) if handler else {"error": f"unknown request {request['op']!r}"}
+        except Exception as e:
+            data = {"error": str(e)}
+        data.setdefault("worker", self.index)
+        self.send({"op": "reply", "id": message["id"], "to": message["from"], "data": data})
+
+
+class _Worker:
+    """The launcher's view of one worker process."""
+
+    def __init__(self, index: int, shard_ids: list[int]):
+        self.index = index
+        self.shard_ids = shard_ids
+        self.process: multiprocessing.Process | None = None
+        self.conn: Connection | None = None
+        self.started = 0.0
+        self.ready = False
+        self.failures = 0
+        self.restart_at = 0.0
+        self.planned = False  # stopped on request, so no backoff
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None
+
+    def send(self, message: dict) -> bool:
+        try:
+            self.conn.send(message)
+            return True
+        except OSError:
+            return False
+
+
+class Launcher:
+    def __init__(self, shard_count: int, processes: int):
+        self.shard_count = shard_count
+        self.processes = processes
+        self.workers = [_Worker(i, shards) for i, shards in enumerate(shard_ranges(shard_count, processes))]
+        self.stopping = False
+        self._context = multiprocessing.get_context("spawn")
+
+    def _spawn(self, worker: _Worker):
+        parent, child = self._context.Pipe()
+        process = self._context.Process(
+            target=worker_main,
+            args=(worker.index, self.processes, worker.shard_ids, self.shard_count, child),
+            name=f"bot-worker-{worker.index}",
+        )
+        process.start()
+        child.close()
+        worker.process, worker.conn = process, parent
+        worker.started = time.monotonic()
+        worker.ready = False
+        worker.planned = False
+        print(f"Worker {worker.index} started (pid {worker.process.pid}, shards "
+              f"{worker.shard_ids[0]}-{worker.shard_ids[-1]} of {self.shard_count})")
+
+    def _start_due(self):
+        """Start the next worker that's down, unless another one is still connecting."""
+        now = time.monotonic()
+        if any(w.alive and not w.ready and now - w.started < READY_TIMEOUT for w in self.workers):
+            return
+        for worker in self.workers:
+            if not worker.alive and worker.restart_at <= now:
+                self._spawn(worker)
+                return
+
+    def _reap(self, worker: _Worker):
+        worker.process.join()
+        code = worker.process.exitcode
+        worker.conn.close()
+        worker.process = worker.conn = None
+        if self.stopping:
+            return
+        if worker.planned:
+            worker.failures = 0
+            worker.restart_at = 0.0
+            print(f"Worker {worker.index} stopped for a restart")
+            return
+        uptime = time.monotonic() - worker.started
+        worker.failures = 1 if uptime > STABLE_SECONDS else worker.failures + 1
+        delay = min(2 ** (worker.failures - 1), MAX_BACKOFF)
+        worker.restart_at = time.monotonic() + delay
+        print(f"Worker {worker.index} exited with code {code} after {uptime:.0f}s, restarting in {delay}s")
+
+    def _route(self, worker: _Worker, message: dict):
+        op = message["op"]
+        if op == "ready":
+            if not worker.ready:
+                print(f"Worker {worker.index} ready after {time.monotonic() - worker.started:.1f}s")
+            worker.ready = True
+        elif op == "broadcast":
+            request = {"op": "request", "id": message["id"], "from": worker.index, "request": message["request"]}
+            sent = sum(w.send(request) for w in self.workers if w.alive)
+            worker.send({"op": "expect", "id": message["id"], "count": sent})
+        elif op == "reply":
+            target = self.workers[message["to"]]
+            if target.alive:
+                target.send(message)
+        elif op == "restart":
+            if not 0 <= message["worker"] < len(self.workers):
+                return
+            target = self.workers[message["worker"]]
+            if target.alive:
+                target.planned = True
+                target.process.terminate()
+
+    def run(self):
+        while not self.stopping:
+            self._start_due()
+            live = [w for w in self.workers if w.alive]
+            by_handle = {}
+            for w in live:
+                by_handle[w.conn] = w
+                by_handle[w.process.sentinel] = w
+            for handle in wait(list(by_handle), timeout=1.0):
+                worker = by_handle[handle]
+                if not worker.alive:
+                    continue  # reaped earlier in this round
+                if handle is worker.conn:
+                    try:
+                        message = worker.conn.recv()
+                    except (EOFError, OSError):
+                        continue  # the sentinel reports the exit
+                    self._route(worker, message)
+                else:
+                    self._reap(worker)
+
+    def stop(self):
+        self.stopping = True
+        for worker in self.workers:
+            if worker.alive:
+                worker.process.terminate()
+        for worker in self.workers:
+            if worker.alive:
+                worker.process.join(timeout=10)
+                if worker.process.is_alive():
+                    worker.process.kill()
+
+
+def launch(processes: int):
+    """Run the bot as a supervised cluster of ``processes`` workers until interrupted."""
+    token = os.getenv("DISCORD_TOKEN")
+    shard_count = int(os.getenv("CLUSTER_SHARDS", "0")) or recommended_shards(token)
+    # Processes beyond the shard count would have nothing to run
+    processes = max(1, min(processes, shard_count))
+    print(f"Starting {shard_count} shard(s) across {processes} process(es)")
+
+    launcher = Launcher(shard_count, processes)
+    signal.signal(signal.SIGTERM, lambda *_: setattr(launcher, "stopping", True))
+    try:
+        launcher.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        launcher.stop()